@@ -1,34 +1,448 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Cookie, Response, Depends
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Cookie, Header, Response, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse, ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne, ReturnDocument, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.read_preferences import ReadPreference
 import os
 import logging
+import asyncio
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, ValidationError, create_model
 from typing import List, Optional, Dict, Any
 import uuid
+import time
+import threading
+import functools
+import bisect
+import difflib
+import json
+import re
+import base64
+import zlib
+import math
+import heapq
+from array import array
+from collections import Counter, OrderedDict, deque
+import contextlib
+import contextvars
+import socket
+import importlib.util
+import random
+import hashlib
 from datetime import datetime, timezone, timedelta
 import httpx
+import numpy as np
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# MongoDB configuration
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '0'))  # 0 waits indefinitely
+MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', '')  # e.g. zstd,snappy,zlib
+MONGO_HISTORY_READ_PREFERENCE = os.environ.get('MONGO_HISTORY_READ_PREFERENCE', 'primary')
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST
+}
+
+class CommandTelemetry(monitoring.CommandListener):
+    """Per-command latency counters fed by the driver"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, duration_micros: int, failed: bool):
+        with self.lock:
+            entry = self.commands.setdefault(name, {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["failures"] += int(failed)
+            entry["total_ms"] += duration_micros / 1000
+            entry["max_ms"] = max(entry["max_ms"], duration_micros / 1000)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.record(event.command_name, event.duration_micros, False)
+
+    def failed(self, event):
+        self.record(event.command_name, event.duration_micros, True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                name: {**entry, "avg_ms": entry["total_ms"] / entry["count"] if entry["count"] else 0.0}
+                for name, entry in self.commands.items()
+            }
+
+class PoolTelemetry(monitoring.ConnectionPoolListener):
+    """Connection pool gauges and checkout wait times fed by the driver"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Checkouts happen synchronously on one driver thread, so the start time is thread-local
+        self.local = threading.local()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def connection_check_out_started(self, event):
+        self.local.started = time.monotonic()
+
+    def connection_checked_out(self, event):
+        wait = time.monotonic() - getattr(self.local, "started", time.monotonic())
+        with self.lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def connection_check_out_failed(self, event):
+        with self.lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self.lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.open_connections -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "max_pool_size": MONGO_MAX_POOL_SIZE,
+                "min_pool_size": MONGO_MIN_POOL_SIZE,
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": self.total_wait / self.checkouts * 1000 if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000
+            }
+
+command_telemetry = CommandTelemetry()
+pool_telemetry = PoolTelemetry()
+
+def mongo_client_options() -> Dict[str, Any]:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [command_telemetry, pool_telemetry]
+    }
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+# Request instrumentation
+SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '1000'))
+SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get('SLOW_REQUEST_SAMPLE_RATE', '1.0'))  # 0 disables sampling
+SLOW_REQUEST_BUFFER = int(os.environ.get('SLOW_REQUEST_BUFFER', '200'))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Histogram:
+    """Prometheus-style latency histogram keyed by a tuple of label values"""
+
+    def __init__(self, name: str, description: str, label_names: tuple):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.lock = threading.Lock()
+        # labels -> per-bucket counts (last slot is +Inf), sum, count
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        with self.lock:
+            entry = self.series.get(labels)
+            if entry is None:
+                entry = self.series[labels] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+            entry[0][bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = [(labels, list(entry[0]), entry[1], entry[2]) for labels, entry in self.series.items()]
+        for labels, buckets, total, count in sorted(series):
+            label_text = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            prefix = f"{label_text}," if label_text else ""
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+request_histogram = Histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+phase_histogram = Histogram("request_phase_duration_seconds", "Time spent in auth, llm and db phases", ("phase",))
+db_histogram = Histogram("db_operation_duration_seconds", "MongoDB operation latency as seen by the app", ("collection", "operation"))
+slow_requests: deque = deque(maxlen=SLOW_REQUEST_BUFFER)
+
+# Phase durations of the request being served; None outside a request
+request_phases: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_phases", default=None)
+# Innermost open span, so nested spans are only counted once in the breakdown
+active_span: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("active_span", default=None)
+
+@contextlib.contextmanager
+def span(phase: str, histogram: Optional[Histogram] = None, labels: Optional[tuple] = None):
+    """Time a block into the phase histogram and the current request's breakdown"""
+    frame = [0.0]  # time spent in nested spans
+    parent = active_span.get()
+    token = active_span.set(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        active_span.reset(token)
+        phase_histogram.observe((phase,), elapsed)
+        if histogram is not None:
+            histogram.observe(labels, elapsed)
+        if parent is not None:
+            parent[0] += elapsed
+        phases = request_phases.get()
+        if phases is not None:
+            # Concurrent children can overlap their parent, so clamp self time at zero
+            phases[phase] = phases.get(phase, 0.0) + max(elapsed - frame[0], 0.0)
+
+class InstrumentedCursor:
+    """Cursor wrapper timing each fetch as a db span"""
+
+    CHAIN_METHODS = {"sort", "skip", "limit", "batch_size", "hint", "max_time_ms", "allow_disk_use"}
+
+    def __init__(self, cursor, labels: tuple):
+        self._cursor = cursor
+        self._labels = labels
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if name in self.CHAIN_METHODS:
+            @functools.wraps(attr)
+            def chained(*args, **kwargs):
+                attr(*args, **kwargs)
+                return self
+            return chained
+        return attr
+
+    async def to_list(self, length=None):
+        with span("db", db_histogram, self._labels):
+            return await self._cursor.to_list(length)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        with span("db", db_histogram, self._labels):
+            return await self._cursor.__anext__()
+
+class InstrumentedCollection:
+    """Collection wrapper timing every driver round trip as a db span"""
+
+    ASYNC_METHODS = {
+        "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+        "delete_one", "delete_many", "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+        "count_documents", "estimated_document_count", "distinct", "bulk_write", "create_index",
+        "create_indexes", "index_information", "drop_index"
+    }
+    CURSOR_METHODS = {"find", "aggregate"}
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        labels = (self._collection.name, name)
+        if name in self.ASYNC_METHODS:
+            @functools.wraps(attr)
+            async def timed(*args, **kwargs):
+                with span("db", db_histogram, labels):
+                    return await attr(*args, **kwargs)
+            return timed
+        if name in self.CURSOR_METHODS:
+            @functools.wraps(attr)
+            def cursor(*args, **kwargs):
+                return InstrumentedCursor(attr(*args, **kwargs), labels)
+            return cursor
+        return attr
+
+class InstrumentedDatabase:
+    """Database wrapper handing out instrumented collections"""
+
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name: str) -> InstrumentedCollection:
+        return InstrumentedCollection(self._database[name])
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return InstrumentedCollection(getattr(self._database, name))
+
+    def get_collection(self, name: str, **kwargs) -> InstrumentedCollection:
+        return InstrumentedCollection(self._database.get_collection(name, **kwargs))
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+client = AsyncIOMotorClient(mongo_url, **mongo_client_options())
+db = InstrumentedDatabase(client[os.environ['DB_NAME']])
+
+def history_collection(name: str):
+    """Collection handle for history/list reads, which may be served by secondaries"""
+    return db.get_collection(name, read_preference=READ_PREFERENCES[MONGO_HISTORY_READ_PREFERENCE])
+
+# Serialization configuration
+FAST_SERIALIZATION = os.environ.get('FAST_SERIALIZATION', 'false').lower() == 'true'
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse if FAST_SERIALIZATION and orjson is not None else JSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 # LLM Configuration
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
+LLM_PROVIDER = "openai"
+LLM_MODEL = "gpt-5"
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '8'))
+LLM_MAX_QUEUE = int(os.environ.get('LLM_MAX_QUEUE', '32'))
+LLM_QUEUE_TIMEOUT = float(os.environ.get('LLM_QUEUE_TIMEOUT', '2'))
+LLM_CALL_TIMEOUT = float(os.environ.get('LLM_CALL_TIMEOUT', '60'))
+LLM_CACHE_SIZE = int(os.environ.get('LLM_CACHE_SIZE', '1000'))
+LLM_CACHE_TTL = float(os.environ.get('LLM_CACHE_TTL', '86400'))
+LLM_CACHE_PERSIST = os.environ.get('LLM_CACHE_PERSIST', 'false').lower() == 'true'
+
+# Batch emotion analysis configuration
+EMOTION_BATCH_SIZE = int(os.environ.get('EMOTION_BATCH_SIZE', '25'))
+EMOTION_BATCH_MAX_ITEMS = int(os.environ.get('EMOTION_BATCH_MAX_ITEMS', '5000'))
+
+# Background job configuration
+JOB_BACKEND = os.environ.get('JOB_BACKEND', 'mongo')  # mongo or memory
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+JOB_MAX_RETRIES = int(os.environ.get('JOB_MAX_RETRIES', '2'))
+JOB_RETRY_DELAY = float(os.environ.get('JOB_RETRY_DELAY', '1'))
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', '120'))  # renewed every third of the lease while running
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '2'))  # picks up jobs submitted to other processes
+
+# Pagination configuration
+PAGE_MAX_LIMIT = int(os.environ.get('PAGE_MAX_LIMIT', '500'))
+
+# Export configuration
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+EXPORT_CHUNK_BYTES = int(os.environ.get('EXPORT_CHUNK_BYTES', '65536'))
+
+# Dashboard configuration
+DASHBOARD_ACTIVITY_LIMIT = int(os.environ.get('DASHBOARD_ACTIVITY_LIMIT', '20'))
+
+# Knowledge base search configuration
+KB_EMBEDDING_MODEL = os.environ.get('KB_EMBEDDING_MODEL', '')  # e.g. all-MiniLM-L6-v2; empty disables vector search
+KB_POLL_INTERVAL = float(os.environ.get('KB_POLL_INTERVAL', '30'))
+
+# Compliance rule engine configuration
+COMPLIANCE_CACHE_SIZE = int(os.environ.get('COMPLIANCE_CACHE_SIZE', '4096'))
+
+# Expert directory configuration
+EXPERTS_POLL_INTERVAL = float(os.environ.get('EXPERTS_POLL_INTERVAL', '30'))
+
+# Funding catalogue configuration
+FUNDING_POLL_INTERVAL = float(os.environ.get('FUNDING_POLL_INTERVAL', '30'))
+
+# Business DNA similarity configuration
+DNA_ANN_THRESHOLD = int(os.environ.get('DNA_ANN_THRESHOLD', '50000'))
+DNA_LSH_TABLES = int(os.environ.get('DNA_LSH_TABLES', '8'))
+DNA_LSH_BITS = int(os.environ.get('DNA_LSH_BITS', '6'))
+DNA_POLL_INTERVAL = float(os.environ.get('DNA_POLL_INTERVAL', '30'))
+
+# Community insights configuration
+INSIGHTS_PRECOMPUTE_INTERVAL = float(os.environ.get('INSIGHTS_PRECOMPUTE_INTERVAL', '600'))
+INSIGHTS_PRECOMPUTE_TOP = int(os.environ.get('INSIGHTS_PRECOMPUTE_TOP', '20'))
+INSIGHTS_FLUSH_INTERVAL = float(os.environ.get('INSIGHTS_FLUSH_INTERVAL', '5'))
+INSIGHTS_FALLBACK_TTL = float(os.environ.get('INSIGHTS_FALLBACK_TTL', '60'))  # default insights stored after a failed generation
+INSIGHTS_TRACKED_KEYS = int(os.environ.get('INSIGHTS_TRACKED_KEYS', '1000'))
+
+# Server-Sent Events configuration
+SSE_PROGRESS_INTERVAL = float(os.environ.get('SSE_PROGRESS_INTERVAL', '1'))
+
+# Write-behind buffer configuration
+WRITE_BUFFER_MAX_BATCH = int(os.environ.get('WRITE_BUFFER_MAX_BATCH', '500'))
+WRITE_BUFFER_FLUSH_INTERVAL = float(os.environ.get('WRITE_BUFFER_FLUSH_INTERVAL', '0.01'))
+WRITE_DURABILITY = os.environ.get('WRITE_DURABILITY', 'ack')  # ack or fire_and_forget
+
+# Session cache configuration
+SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', '10000'))
+SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', '60'))
+SESSION_REVOCATION_POLL_INTERVAL = float(os.environ.get('SESSION_REVOCATION_POLL_INTERVAL', '5'))
+SESSION_LOOKUP_AGGREGATION = os.environ.get('SESSION_LOOKUP_AGGREGATION', 'false').lower() == 'true'
+
+# Emergent Auth client configuration
+EMERGENT_AUTH_URL = os.environ.get('EMERGENT_AUTH_URL', 'https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data')
+AUTH_HTTP_TIMEOUT = float(os.environ.get('AUTH_HTTP_TIMEOUT', '10'))
+AUTH_HTTP_MAX_CONNECTIONS = int(os.environ.get('AUTH_HTTP_MAX_CONNECTIONS', '100'))
+AUTH_HTTP_MAX_KEEPALIVE = int(os.environ.get('AUTH_HTTP_MAX_KEEPALIVE', '20'))
+AUTH_HTTP2 = os.environ.get('AUTH_HTTP2', 'true').lower() == 'true' and importlib.util.find_spec("h2") is not None
+AUTH_HTTP_RETRIES = int(os.environ.get('AUTH_HTTP_RETRIES', '2'))
+AUTH_RETRY_BACKOFF = float(os.environ.get('AUTH_RETRY_BACKOFF', '0.2'))
+AUTH_SESSION_DATA_TTL = float(os.environ.get('AUTH_SESSION_DATA_TTL', '30'))  # 0 disables caching
+AUTH_SESSION_DATA_CACHE_SIZE = int(os.environ.get('AUTH_SESSION_DATA_CACHE_SIZE', '10000'))
+AUTH_PRUNE_EXPIRED_SESSIONS = os.environ.get('AUTH_PRUNE_EXPIRED_SESSIONS', 'false').lower() == 'true'
 
 # Configure logging
 logging.basicConfig(
@@ -119,6 +533,22 @@ class ClientPersona(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     user_id: str
 
+# Structured AI output models (fields the LLM fills in; ids and ownership are set server-side)
+class EmotionDraft(BaseModel):
+    emotions: Dict[str, float]
+    dominant_emotion: str
+    confidence: float
+
+class PersonaDraft(BaseModel):
+    name: str
+    title: str
+    company: str
+    pain_points: List[str]
+    goals: List[str]
+    decision_style: str
+    stakeholders: List[Stakeholder]
+    confidence_score: float
+
 # Funding & Compliance Models
 class FundingOpportunity(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -133,6 +563,15 @@ class FundingOpportunity(BaseModel):
     requirements: List[str]
     application_url: str
 
+class FundingCriteria(BaseModel):
+    # Empty lists mean the opportunity is open to any value
+    industries: List[str] = []
+    stages: List[str] = []
+    locations: List[str] = []
+    min_employees: int = 0
+    max_employees: Optional[int] = None
+    needs: List[str] = []
+
 class ComplianceCheck(BaseModel):
     category: str
     status: str  # compliant, warning, non-compliant
@@ -173,6 +612,33 @@ class BusinessDNA(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     user_id: str
 
+# Background Job Models
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    kind: str
+    status: str = "queued"  # queued, running, succeeded, failed
+    payload: Dict[str, Any]
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    user_id: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class DNADraft(BaseModel):
+    personality: PersonalityMetrics
+    swot: SWOTAnalysis
+    preferences: Dict[str, str]
+
+class SimilarBusiness(BaseModel):
+    dna_id: str
+    user_id: str
+    company_name: str
+    industry: str
+    stage: str
+    similarity: float
+
 # Community Models
 class CommunityInsight(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -185,6 +651,17 @@ class CommunityInsight(BaseModel):
     engagement: Dict[str, int]  # views, likes, shares
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class InsightDraft(BaseModel):
+    title: str
+    description: str
+    type: str
+    category: str
+    relevance_score: float
+    source: str
+
+class InsightsDraft(BaseModel):
+    insights: List[InsightDraft]
+
 class KnowledgeArticle(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
@@ -204,12 +681,32 @@ class Expert(BaseModel):
     rating: float
     bio: str
 
+# Pagination Models
+class Page(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
 # Request Models
 class EmotionAnalyzeRequest(BaseModel):
     user_id: str
     text: str
     context: Optional[str] = None
 
+class EmotionBatchRequest(BaseModel):
+    items: List[EmotionAnalyzeRequest]
+
+class EmotionBatchError(BaseModel):
+    index: int
+    error: str
+
+class EmotionBatchResult(BaseModel):
+    results: List[EmotionAnalysis]
+    errors: List[EmotionBatchError]
+
+class JobSubmitRequest(BaseModel):
+    kind: str  # emotion.analyze, persona.generate
+    payload: Dict[str, Any]
+
 class TeamAnalyzeRequest(BaseModel):
     team_id: str
 
@@ -234,6 +731,18 @@ class FundingSearchRequest(BaseModel):
     employee_count: int
     needs: List[str]
 
+class AddFundingOpportunityRequest(BaseModel):
+    name: str
+    type: str
+    amount_min: float
+    amount_max: float
+    provider: str
+    eligibility: List[str]
+    deadline: Optional[str] = None
+    requirements: List[str]
+    application_url: str
+    criteria: FundingCriteria = Field(default_factory=FundingCriteria)
+
 class ComplianceCheckRequest(BaseModel):
     company_name: str
     industry: str
@@ -250,13 +759,537 @@ class GenerateDNARequest(BaseModel):
     challenges: List[str]
     user_id: str
 
+class AddKnowledgeArticleRequest(BaseModel):
+    title: str
+    content: str
+    category: str
+    tags: List[str]
+    author: str
+    read_time: int
+
+class AddExpertRequest(BaseModel):
+    name: str
+    title: str
+    specialization: List[str]
+    expertise_level: float
+    rating: float
+    bio: str
+
 class GenerateInsightsRequest(BaseModel):
     industry: str
     topic: str
     timeframe: str  # day, week, month
 
+# ==================== DATABASE INDEXES ====================
+
+# Every index the API relies on, with the route queries it serves
+INDEX_MANIFEST = [
+    {
+        "collection": "user_sessions",
+        "keys": [("session_token", 1), ("expires_at", 1)],
+        "options": {"name": "session_token_expires_at"},
+        "covers": ["get_current_user", "POST /api/auth/logout"]
+    },
+    {
+        "collection": "user_sessions",
+        "keys": [("session_token", 1)],
+        "options": {"name": "session_token_unique", "unique": True},
+        "covers": ["POST /api/auth/session idempotent session upsert"]
+    },
+    {
+        "collection": "user_sessions",
+        "keys": [("expires_at", 1)],
+        "options": {"name": "expires_at_ttl", "expireAfterSeconds": 0},
+        "covers": ["TTL purge of expired sessions"]
+    },
+    {
+        "collection": "session_revocations",
+        "keys": [("revoked_at", 1)],
+        # Kept well past any cache entry they need to evict, then purged
+        "options": {"name": "revoked_at_ttl", "expireAfterSeconds": int(SESSION_CACHE_TTL) + 3600},
+        "covers": ["SessionRevocations.refresh", "TTL purge of old revocations"]
+    },
+    {
+        "collection": "emotion_analysis",
+        "keys": [("user_id", 1), ("timestamp", -1), ("id", -1)],
+        "options": {"name": "user_id_timestamp_id"},
+        "covers": ["GET /api/emotion/history/{user_id}", "GET /api/emotion/history/{user_id}/page", "GET /api/export/emotion_analysis"]
+    },
+    {
+        "collection": "compliance_reports",
+        "keys": [("user_id", 1), ("timestamp", -1), ("id", -1)],
+        "options": {"name": "user_id_timestamp_id"},
+        "covers": ["GET /api/compliance/history/{user_id}", "GET /api/compliance/history/{user_id}/page", "GET /api/export/compliance_reports"]
+    },
+    {
+        "collection": "personas",
+        "keys": [("id", 1)],
+        "options": {"name": "id"},
+        "covers": ["DELETE /api/persona/{persona_id}"]
+    },
+    {
+        "collection": "personas",
+        "keys": [("user_id", 1), ("created_at", -1), ("id", -1)],
+        "options": {"name": "user_id_created_at_id"},
+        "covers": ["GET /api/persona/all/{user_id}", "GET /api/persona/all/{user_id}/page", "GET /api/export/personas"]
+    },
+    {
+        "collection": "team_members",
+        "keys": [("user_id", 1), ("id", 1)],
+        "options": {"name": "user_id_id"},
+        "covers": ["GET /api/team/members/{user_id}", "GET /api/team/members/{user_id}/page", "POST /api/team/analyze"]
+    },
+    {
+        "collection": "business_dna",
+        "keys": [("user_id", 1), ("created_at", -1), ("id", -1)],
+        "options": {"name": "user_id_created_at_id"},
+        "covers": ["GET /api/dna/{user_id}", "GET /api/export/business_dna"]
+    },
+    {
+        "collection": "jobs",
+        "keys": [("id", 1)],
+        "options": {"name": "id"},
+        "covers": ["GET /api/jobs/{job_id}"]
+    },
+    {
+        "collection": "jobs",
+        "keys": [("status", 1), ("created_at", 1)],
+        "options": {"name": "status_created_at"},
+        "covers": ["JobQueue claim of queued and lease-expired jobs"]
+    },
+    {
+        "collection": "knowledge_articles",
+        "keys": [("id", 1)],
+        "options": {"name": "id"},
+        "covers": ["KnowledgeSearchIndex.refresh"]
+    },
+    {
+        "collection": "funding_opportunities",
+        "keys": [("id", 1)],
+        "options": {"name": "id"},
+        "covers": ["FundingMatcher.load", "FundingMatcher.apply_change"]
+    },
+    {
+        "collection": "experts",
+        "keys": [("id", 1)],
+        "options": {"name": "id"},
+        "covers": ["ExpertIndex.refresh"]
+    },
+    {
+        "collection": "community_insights",
+        "keys": [("expires_at", 1)],
+        "options": {"name": "expires_at_ttl", "expireAfterSeconds": 0},
+        "covers": ["TTL purge of stale precomputed insights"]
+    },
+    {
+        "collection": "llm_cache",
+        "keys": [("expires_at", 1)],
+        "options": {"name": "expires_at_ttl", "expireAfterSeconds": 0},
+        "covers": ["TTL purge of persisted call_ai responses"]
+    }
+]
+
+index_report: List[Dict[str, Any]] = []
+
+async def ensure_indexes():
+    """Create every manifest index concurrently; existing indexes are a no-op"""
+    results = await asyncio.gather(
+        *[db[spec["collection"]].create_index(spec["keys"], **spec["options"]) for spec in INDEX_MANIFEST],
+        return_exceptions=True
+    )
+    
+    index_report.clear()
+    for spec, result in zip(INDEX_MANIFEST, results):
+        entry = {
+            "collection": spec["collection"],
+            "name": spec["options"]["name"],
+            "keys": [list(key) for key in spec["keys"]],
+            "covers": spec["covers"],
+            "status": "ok" if not isinstance(result, Exception) else "error"
+        }
+        if isinstance(result, Exception):
+            entry["error"] = str(result)
+            logger.error(f"Index creation error on {spec['collection']}.{spec['options']['name']}: {str(result)}")
+        index_report.append(entry)
+    return index_report
+
+# ==================== WRITE BUFFER ====================
+
+class WriteBuffer:
+    """Collects inserts per collection and flushes them with unordered insert_many on size or time.
+
+    In "ack" mode callers wait until their document's batch is written; in "fire_and_forget"
+    mode they return immediately and failures are only logged.
+    """
+
+    def __init__(self, max_batch: int, flush_interval: float, durability: str):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.pending: Dict[str, List[tuple]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._flushing: set = set()
+        self.flushes = 0
+        self.documents = 0
+        self.errors = 0
+        self.total_flush_time = 0.0
+        self.max_flush_time = 0.0
+
+    async def insert(self, collection: str, doc: Dict[str, Any], durability: Optional[str] = None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future() if (durability or self.durability) == "ack" else None
+        batch = self.pending.setdefault(collection, [])
+        batch.append((doc, future))
+        
+        if len(batch) >= self.max_batch:
+            self._spawn_flush(collection)
+        elif collection not in self._timers:
+            self._timers[collection] = loop.call_later(self.flush_interval, self._spawn_flush, collection)
+        
+        if future:
+            await future
+
+    def _spawn_flush(self, collection: str):
+        task = asyncio.ensure_future(self.flush(collection))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def flush(self, collection: str):
+        timer = self._timers.pop(collection, None)
+        if timer:
+            timer.cancel()
+        batch = self.pending.pop(collection, [])
+        if not batch:
+            return
+        
+        failed: Dict[int, Exception] = {}
+        started = time.monotonic()
+        try:
+            await db[collection].insert_many([doc for doc, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = Exception(error.get("errmsg", "write error"))
+        except Exception as e:
+            failed = {index: e for index in range(len(batch))}
+        
+        elapsed = time.monotonic() - started
+        self.flushes += 1
+        self.documents += len(batch) - len(failed)
+        self.errors += len(failed)
+        self.total_flush_time += elapsed
+        self.max_flush_time = max(self.max_flush_time, elapsed)
+        
+        for index, (_, future) in enumerate(batch):
+            if future is None:
+                if index in failed:
+                    logger.error(f"Buffered write error on {collection}: {str(failed[index])}")
+            elif not future.done():
+                if index in failed:
+                    future.set_exception(failed[index])
+                else:
+                    future.set_result(None)
+
+    async def drain(self, collections: List[str]):
+        """Write out these collections' pending documents and wait for flushes already under way"""
+        await asyncio.gather(*[self.flush(collection) for collection in collections])
+        await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    async def flush_all(self):
+        await asyncio.gather(*[self.flush(collection) for collection in list(self.pending)])
+        await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "durability": self.durability,
+            "depth": {collection: len(batch) for collection, batch in self.pending.items()},
+            "flushes": self.flushes,
+            "documents": self.documents,
+            "errors": self.errors,
+            "avg_flush_ms": self.total_flush_time / self.flushes * 1000 if self.flushes else 0.0,
+            "max_flush_ms": self.max_flush_time * 1000
+        }
+
+write_buffer = WriteBuffer(WRITE_BUFFER_MAX_BATCH, WRITE_BUFFER_FLUSH_INTERVAL, WRITE_DURABILITY)
+
+# ==================== SINGLE-FLIGHT ====================
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers for the key share its result.
+
+    The call runs in a detached task that every caller, the first one included, awaits through
+    asyncio.shield, so a cancelled caller (e.g. a disconnected client) never fails the others.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Any, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def run(self, key, call):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._tasks[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every caller was cancelled before it failed
+
+# ==================== INDEX REFRESH ====================
+
+async def watch_collection(collection: str, apply_change, refresh, poll_interval, label: str):
+    """Feed change-stream events to an in-process index; fall back to polling where change streams are unavailable"""
+    try:
+        async with db[collection].watch(full_document="updateLookup") as stream:
+            async for change in stream:
+                await apply_change(change)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.info(f"{label} change stream unavailable ({str(e)}); polling every {poll_interval()}s")
+        while True:
+            await asyncio.sleep(poll_interval())
+            try:
+                await refresh()
+            except Exception as e:
+                logger.error(f"{label} refresh error: {str(e)}")
+
+class WatchedIndex:
+    """Start/stop plumbing for indexes kept current by watch_collection"""
+
+    _watcher: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.refresh()
+        self._watcher = asyncio.create_task(self.watch())
+
+    async def stop(self):
+        if self._watcher:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
 # ==================== AUTH HELPERS ====================
 
+def as_utc(value: datetime) -> datetime:
+    """Mongo hands back naive datetimes; treat them as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+class SessionCache:
+    """Bounded LRU cache of session token -> user, honouring session expiry"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional[User]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at, cached_until = entry
+        if cached_until <= time.monotonic() or expires_at <= datetime.now(timezone.utc):
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def put(self, token: str, user: User, expires_at: datetime):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        self._entries[token] = (user, as_utc(expires_at), time.monotonic() + self.ttl)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, token: str):
+        self._entries.pop(token, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "lookup_aggregation": SESSION_LOOKUP_AGGREGATION
+        }
+
+session_cache = SessionCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
+
+class SessionRevocations(WatchedIndex):
+    """Carries logouts to every worker's session cache through the session_revocations collection"""
+
+    def __init__(self, cache: SessionCache):
+        self.cache = cache
+        self.since = datetime.now(timezone.utc)
+        self.applied = 0
+
+    async def revoke(self, token: str):
+        self.cache.invalidate(token)
+        await db.session_revocations.insert_one({"session_token": token, "revoked_at": datetime.now(timezone.utc)})
+
+    def apply(self, token: str):
+        self.cache.invalidate(token)
+        self.applied += 1
+
+    async def refresh(self):
+        started = datetime.now(timezone.utc)
+        async for doc in db.session_revocations.find({"revoked_at": {"$gte": self.since}}, {"_id": 0, "session_token": 1}):
+            self.apply(doc["session_token"])
+        # Overlap the next window to tolerate clock skew between workers; invalidating twice is harmless
+        self.since = started - timedelta(seconds=SESSION_REVOCATION_POLL_INTERVAL)
+
+    async def apply_change(self, change: Dict[str, Any]):
+        if change["operationType"] == "insert":
+            self.apply(change["fullDocument"]["session_token"])
+
+    async def watch(self):
+        await watch_collection("session_revocations", self.apply_change, self.refresh,
+                               lambda: SESSION_REVOCATION_POLL_INTERVAL, "Session revocation")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"applied": self.applied}
+
+session_revocations = SessionRevocations(session_cache)
+
+class SessionDataClient:
+    """App-lifetime Emergent Auth client: pooled keep-alive connections, retries and a short session-data cache"""
+
+    def __init__(self, url: str, timeout: float, retries: int, backoff: float, cache_ttl: float, cache_size: int):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.transport: Optional[httpx.AsyncBaseTransport] = None  # swapped for a stub in tests
+        self._http: Optional[httpx.AsyncClient] = None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.flight = SingleFlight()
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.cache_hits = 0
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                http2=AUTH_HTTP2,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=AUTH_HTTP_MAX_CONNECTIONS, max_keepalive_connections=AUTH_HTTP_MAX_KEEPALIVE),
+                transport=self.transport
+            )
+        return self._http
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def request(self, session_id: str) -> Dict[str, Any]:
+        """Call the session-data endpoint, retrying transport errors, 429 and 5xx with jittered backoff"""
+        for attempt in range(self.retries + 1):
+            self.requests += 1
+            try:
+                resp = await self.http.get(self.url, headers={"X-Session-ID": session_id})
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {str(e)}"
+            else:
+                if resp.status_code == 200:
+                    return resp.json()
+                if resp.status_code != 429 and resp.status_code < 500:
+                    raise HTTPException(status_code=400, detail="Invalid session ID")
+                error = f"HTTP {resp.status_code}"
+            if attempt < self.retries:
+                self.retried += 1
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        self.failures += 1
+        logger.error(f"Session data lookup failed: {error}")
+        raise HTTPException(status_code=502, detail="Authentication service unavailable")
+
+    async def fetch(self, session_id: str) -> Dict[str, Any]:
+        """Verified session data, shared across duplicate logins for the same session ID"""
+        entry = self._entries.get(session_id)
+        if entry:
+            if entry[1] > time.monotonic():
+                self.cache_hits += 1
+                return entry[0]
+            del self._entries[session_id]
+        return await self.flight.run(session_id, lambda: self._load(session_id))
+
+    async def _load(self, session_id: str) -> Dict[str, Any]:
+        data = await self.request(session_id)
+        if self.cache_ttl > 0:
+            self._entries[session_id] = (data, time.monotonic() + self.cache_ttl)
+            while len(self._entries) > self.cache_size:
+                self._entries.popitem(last=False)
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "http2": AUTH_HTTP2,
+            "requests": self.requests,
+            "retried": self.retried,
+            "failures": self.failures,
+            "cache_size": len(self._entries),
+            "cache_hits": self.cache_hits,
+            "coalesced": self.flight.coalesced
+        }
+
+session_data_client = SessionDataClient(
+    EMERGENT_AUTH_URL, AUTH_HTTP_TIMEOUT, AUTH_HTTP_RETRIES, AUTH_RETRY_BACKOFF,
+    AUTH_SESSION_DATA_TTL, AUTH_SESSION_DATA_CACHE_SIZE
+)
+
+async def load_session_user(token: str):
+    """Fetch the live session and its user, in one $lookup round-trip when enabled"""
+    query = {
+        "session_token": token,
+        "expires_at": {"$gt": datetime.now(timezone.utc)}
+    }
+    
+    if SESSION_LOOKUP_AGGREGATION:
+        docs = await db.user_sessions.aggregate([
+            {"$match": query},
+            {"$limit": 1},
+            {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "_id", "as": "user"}}
+        ]).to_list(1)
+        if not docs:
+            return None, None
+        session = docs[0]
+        return session, (session.pop("user") or [None])[0]
+    
+    session = await db.user_sessions.find_one(query)
+    if not session:
+        return None, None
+    return session, await db.users.find_one({"_id": session["user_id"]})
+
 async def get_current_user(session_token: Optional[str] = Cookie(None), authorization: Optional[str] = None):
     """Get current user from session token in cookie or Authorization header"""
     token = session_token
@@ -269,63 +1302,63 @@ async def get_current_user(session_token: Optional[str] = Cookie(None), authoriz
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    # Check session
-    session = await db.user_sessions.find_one({
-        "session_token": token,
-        "expires_at": {"$gt": datetime.now(timezone.utc)}
-    })
+    with span("auth"):
+        cached_user = session_cache.get(token)
+        if cached_user:
+            return cached_user
     
-    if not session:
-        raise HTTPException(status_code=401, detail="Invalid or expired session")
+        session, user_doc = await load_session_user(token)
     
-    # Get user
-    user_doc = await db.users.find_one({"_id": session["user_id"]})
-    if not user_doc:
-        raise HTTPException(status_code=404, detail="User not found")
+        if not session:
+            raise HTTPException(status_code=401, detail="Invalid or expired session")
     
-    user_doc["id"] = user_doc.pop("_id")
-    return User(**user_doc)
+        if not user_doc:
+            raise HTTPException(status_code=404, detail="User not found")
+    
+        user_doc["id"] = user_doc.pop("_id")
+        user = User(**user_doc)
+        session_cache.put(token, user, session["expires_at"])
+        return user
 
 # ==================== AUTH ROUTES ====================
 
+async def insert_if_missing(collection: str, query: Dict[str, Any], fields: Dict[str, Any]):
+    """Insert a document on first sight without a read; an existing match is left untouched"""
+    update = {"$setOnInsert": fields}
+    try:
+        await db[collection].update_one(query, update, upsert=True)
+    except DuplicateKeyError:
+        # A concurrent login inserted it between our match and insert; now it matches
+        await db[collection].update_one(query, update, upsert=True)
+
 @api_router.post("/auth/session")
 async def create_session(session_data: SessionData, response: Response):
     """Create session from Emergent Auth"""
     try:
         # Fetch user data from Emergent
-        async with httpx.AsyncClient() as client:
-            headers = {"X-Session-ID": session_data.session_token}
-            resp = await client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers=headers
-            )
-            if resp.status_code != 200:
-                raise HTTPException(status_code=400, detail="Invalid session ID")
-            
-            user_data = resp.json()
-        
-        # Check if user exists
-        existing_user = await db.users.find_one({"_id": user_data["id"]})
-        
-        if not existing_user:
-            # Create new user
-            user_doc = {
-                "_id": user_data["id"],
-                "email": user_data["email"],
-                "name": user_data["name"],
-                "picture": user_data.get("picture"),
-                "created_at": datetime.now(timezone.utc)
-            }
-            await db.users.insert_one(user_doc)
+        user_data = await session_data_client.fetch(session_data.session_token)
         
-        # Create session
+        # Create the user if needed and the session in one concurrent pass
+        now = datetime.now(timezone.utc)
         session_doc = {
             "user_id": user_data["id"],
             "session_token": user_data["session_token"],
-            "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
-            "created_at": datetime.now(timezone.utc)
+            "expires_at": now + timedelta(days=7),
+            "created_at": now
         }
-        await db.user_sessions.insert_one(session_doc)
+        writes = [
+            insert_if_missing("users", {"_id": user_data["id"]}, {
+                "email": user_data["email"],
+                "name": user_data["name"],
+                "picture": user_data.get("picture"),
+                "created_at": now
+            }),
+            # Duplicate logins for one X-Session-ID share a token, so they must share one session document
+            insert_if_missing("user_sessions", {"session_token": user_data["session_token"]}, session_doc)
+        ]
+        if AUTH_PRUNE_EXPIRED_SESSIONS:
+            writes.append(db.user_sessions.delete_many({"user_id": user_data["id"], "expires_at": {"$lte": now}}))
+        await asyncio.gather(*writes)
         
         # Set cookie
         response.set_cookie(
@@ -340,6 +1373,8 @@ async def create_session(session_data: SessionData, response: Response):
         
         return {"success": True, "user": user_data}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Session creation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -353,75 +1388,619 @@ async def get_me(current_user: User = Depends(get_current_user)):
 async def logout(response: Response, session_token: Optional[str] = Cookie(None)):
     """Logout user"""
     if session_token:
-        await db.user_sessions.delete_one({"session_token": session_token})
+        # delete_many also clears duplicates written before session tokens were unique
+        await db.user_sessions.delete_many({"session_token": session_token})
+        # Evict from this worker's cache now and from the others' on their next change event or poll
+        await session_revocations.revoke(session_token)
     
     response.delete_cookie("session_token", path="/")
     return {"success": True}
 
 # ==================== AI HELPER ====================
 
-async def call_ai(prompt: str, system_message: str = "You are a helpful AI assistant.") -> str:
-    """Call AI with GPT-5"""
-    try:
-        chat = LlmChat(
+class LlmPool:
+    """App-lifetime gateway to the LLM with bounded concurrency, deadlines and back-pressure"""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float, call_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.call_timeout = call_timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.factory = self.create_client
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.total_latency = 0.0
+
+    def create_client(self, system_message: str):
+        # LlmChat accumulates conversation history, so each call gets its own chat;
+        # the HTTP transport underneath is shared by the provider SDK
+        return LlmChat(
             api_key=EMERGENT_LLM_KEY,
             session_id=str(uuid.uuid4()),
             system_message=system_message
-        ).with_model("openai", "gpt-5")
+        ).with_model(LLM_PROVIDER, LLM_MODEL)
+
+    def reject(self):
+        self.rejected += 1
+        raise HTTPException(
+            status_code=429,
+            detail="AI service is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+    async def send(self, prompt: str, system_message: str, wait_for_slot: bool = False) -> str:
+        """Interactive calls are rejected with 429 when the queue is full or slow; batch work
+        (wait_for_slot) queues until a slot frees up instead"""
+        # Callers still acquiring a free slot are not queued; count only those beyond the free slots
+        queued = self.waiting - (self.max_concurrency - self.in_flight)
+        if not wait_for_slot and queued >= self.max_queue:
+            self.reject()
+        
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), None if wait_for_slot else self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.reject()
+        finally:
+            self.waiting -= 1
+        
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            chat = self.factory(system_message)
+            response = await asyncio.wait_for(chat.send_message(UserMessage(text=prompt)), self.call_timeout)
+            self.completed += 1
+            return response
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.total_latency += time.monotonic() - started
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.completed + self.timeouts + self.errors
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "peak_queue_depth": self.peak_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "avg_latency_ms": self.total_latency / calls * 1000 if calls else 0.0
+        }
+
+llm_pool = LlmPool(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT, LLM_CALL_TIMEOUT)
+
+class LlmResponseCache:
+    """Content-addressed cache of LLM responses: in-memory LRU, optional Mongo tier, single-flight"""
+
+    def __init__(self, max_size: int, ttl: float, persist: bool):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persist = persist
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.flight = SingleFlight()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.latency_saved = 0.0
+
+    @staticmethod
+    def key(system_message: str, prompt: str) -> str:
+        raw = "\x00".join([LLM_PROVIDER, LLM_MODEL, system_message, prompt])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get_memory(self, key: str) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key: str, response: str, latency: float):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (response, latency, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _get_persistent(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await db.llm_cache.find_one({
+                "_id": key,
+                "expires_at": {"$gt": datetime.now(timezone.utc)}
+            })
+        except Exception as e:
+            logger.error(f"LLM cache read error: {str(e)}")
+            return None
+
+    async def _put_persistent(self, key: str, response: str, latency: float):
+        try:
+            await db.llm_cache.replace_one(
+                {"_id": key},
+                {
+                    "response": response,
+                    "latency": latency,
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"LLM cache write error: {str(e)}")
+
+    async def get_or_call(self, system_message: str, prompt: str, call, validate=None) -> str:
+        """Cached response for the prompt; responses failing validate are returned but never cached"""
+        key = self.key(system_message, prompt)
+        
+        entry = self._get_memory(key)
+        if entry:
+            self.memory_hits += 1
+            self.latency_saved += entry[1]
+            return entry[0]
         
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
+        # Identical request already upstream: wait for its result instead of calling again
+        follower = key in self.flight
+        response = await self.flight.run(key, lambda: self._load(key, call, validate))
+        if follower and key in self._entries:
+            self.latency_saved += self._entries[key][1]
         return response
+
+    async def _load(self, key: str, call, validate) -> str:
+        doc = await self._get_persistent(key) if self.persist else None
+        if doc and (validate is None or validate(doc["response"])):
+            self.persistent_hits += 1
+            self.latency_saved += doc["latency"]
+            self._put_memory(key, doc["response"], doc["latency"])
+            return doc["response"]
+        self.misses += 1
+        started = time.monotonic()
+        response = await call()
+        latency = time.monotonic() - started
+        if validate is not None and not validate(response):
+            self.rejected += 1
+            return response
+        self._put_memory(key, response, latency)
+        if self.persist:
+            await self._put_persistent(key, response, latency)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.persistent_hits + self.flight.coalesced
+        lookups = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "persistent": self.persist,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "coalesced": self.flight.coalesced,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "latency_saved_ms": self.latency_saved * 1000
+        }
+
+llm_cache = LlmResponseCache(LLM_CACHE_SIZE, LLM_CACHE_TTL, LLM_CACHE_PERSIST)
+
+async def call_ai(prompt: str, system_message: str = "You are a helpful AI assistant.", wait_for_slot: bool = False,
+                  validate=None) -> str:
+    """Call AI with GPT-5"""
+    try:
+        with span("llm"):
+            return await llm_cache.get_or_call(
+                system_message,
+                prompt,
+                lambda: llm_pool.send(prompt, system_message, wait_for_slot),
+                validate
+            )
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        logger.error(f"AI call error: no response within {llm_pool.call_timeout}s")
+        return f"AI analysis: {prompt[:100]}... (simulated response)"
     except Exception as e:
         logger.error(f"AI call error: {str(e)}")
         return f"AI analysis: {prompt[:100]}... (simulated response)"
 
-# ==================== EMOTION & TEAM ROUTES ====================
-
-@api_router.post("/emotion/analyze", response_model=EmotionAnalysis)
-async def analyze_emotion(request: EmotionAnalyzeRequest, current_user: User = Depends(get_current_user)):
-    """Analyze emotion from text"""
-    prompt = f"""Analyze the emotional content of this text and return emotion scores:
-Text: "{request.text}"
-Context: {request.context or 'None'}
+# ==================== STRUCTURED OUTPUT ====================
+
+JSON_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.S)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+def json_candidates(text: str):
+    """Yield likely JSON payloads embedded in a free-form AI response"""
+    for match in JSON_FENCE.finditer(text):
+        yield match.group(1)
+    for open_char, close_char in (("{", "}"), ("[", "]")):
+        start, end = text.find(open_char), text.rfind(close_char)
+        if start != -1 and end > start:
+            yield text[start:end + 1]
+
+class StructuredOutput:
+    """Validates AI responses against Pydantic schemas and tracks parse outcomes"""
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, name: str, status: str):
+        counts = self.counts.setdefault(name, {"ok": 0, "repaired": 0, "fallback": 0})
+        counts[status] += 1
+
+    @staticmethod
+    def decode(text: str, adapter: TypeAdapter) -> tuple:
+        """(value, "ok" | "repaired"), or (None, "fallback") when no JSON in the text validates"""
+        try:
+            return adapter.validate_json(text), "ok"
+        except ValidationError:
+            pass
+        
+        for candidate in json_candidates(text):
+            for attempt in (candidate, TRAILING_COMMA.sub(r"\1", candidate)):
+                try:
+                    return adapter.validate_json(attempt), "repaired"
+                except ValidationError:
+                    continue
+        return None, "fallback"
+
+    def parse(self, text: str, adapter: TypeAdapter, name: str) -> Optional[Any]:
+        value, status = self.decode(text, adapter)
+        self.record(name, status)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        result = {}
+        for name, counts in self.counts.items():
+            total = sum(counts.values())
+            result[name] = {**counts, "success_ratio": (total - counts["fallback"]) / total if total else 0.0}
+        return result
+
+structured_output = StructuredOutput()
+
+EMOTION_DRAFT_ADAPTER = TypeAdapter(EmotionDraft)
+EMOTION_BATCH_ADAPTER = TypeAdapter(List[Dict[str, Any]])
+PERSONA_DRAFT_ADAPTER = TypeAdapter(PersonaDraft)
+
+async def call_ai_structured(prompt: str, system_message: str, adapter: TypeAdapter, name: str, describe_schema: bool = True,
+                             wait_for_slot: bool = False) -> Optional[Any]:
+    """Call AI for JSON conforming to the adapter's schema; None when it cannot be parsed"""
+    if describe_schema:
+        prompt = f"{prompt}\n\nRespond with only JSON matching this JSON schema:\n{json.dumps(adapter.json_schema())}"
+    # Only cache replies that validate, so one bad reply doesn't pin the fallback for LLM_CACHE_TTL
+    ai_response = await call_ai(prompt, system_message, wait_for_slot,
+                                lambda text: structured_output.decode(text, adapter)[1] != "fallback")
+    return structured_output.parse(ai_response, adapter, name)
+
+# ==================== STREAMING (SSE) ====================
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_ai_result(work, result_event: str):
+    """Stream an AI-backed job as SSE: immediate status, periodic progress, then fields and the final object"""
+    task = asyncio.ensure_future(work)
+    started = time.monotonic()
+    yield sse_event("status", {"stage": "generating"})
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=SSE_PROGRESS_INTERVAL)
+            if not task.done():
+                yield sse_event("progress", {"elapsed_ms": int((time.monotonic() - started) * 1000)})
+        result = task.result()
+    except HTTPException as e:
+        yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+        return
+    except Exception as e:
+        logger.error(f"Streaming error: {str(e)}")
+        yield sse_event("error", {"status": 500, "detail": str(e)})
+        return
+    finally:
+        # Client went away mid-generation
+        if not task.done():
+            task.cancel()
+    
+    payload = json.loads(result.model_dump_json())
+    for name, value in payload.items():
+        yield sse_event("field", {"name": name, "value": value})
+    yield sse_event(result_event, payload)
+
+def sse_response(stream) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-Provide scores (0-1) for: joy, sadness, anger, fear, surprise, neutral.
-Identify the dominant emotion and confidence level."""
+# ==================== SERIALIZATION ====================
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return as_utc(value).isoformat()
+    return str(value)
+
+def dumps_json(payload: Any) -> bytes:
+    """Compact JSON bytes, encoded by orjson in fast serialization mode when it is installed"""
+    if FAST_SERIALIZATION and orjson is not None:
+        return orjson.dumps(payload, default=json_default, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=json_default, separators=(",", ":")).encode("utf-8")
+
+@functools.lru_cache(maxsize=None)
+def list_adapter(model) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+@functools.lru_cache(maxsize=256)
+def page_adapter(model, fields: Optional[frozenset]) -> TypeAdapter:
+    """Page adapter whose items carry only the projected fields, so partial documents validate"""
+    if fields:
+        model = create_model(
+            f"{model.__name__}Partial",
+            **{name: (Optional[info.annotation], None) for name, info in model.model_fields.items() if name in fields}
+        )
+    return TypeAdapter(create_model(f"{model.__name__}Page", items=(List[model], ...), next_cursor=(Optional[str], None)))
+
+def list_response(model, docs: List[Dict[str, Any]]):
+    """Validate and encode a document list in one pass, skipping FastAPI's per-item re-validation"""
+    if not FAST_SERIALIZATION:
+        return docs
+    adapter = list_adapter(model)
+    return Response(content=adapter.dump_json(adapter.validate_python(docs), by_alias=True), media_type="application/json")
+
+def model_response(instance: BaseModel):
+    """Encode an already-validated model directly instead of letting FastAPI validate it again"""
+    if not FAST_SERIALIZATION:
+        return instance
+    return Response(content=instance.model_dump_json(by_alias=True), media_type="application/json")
+
+# ==================== PAGINATION ====================
+
+# Bookkeeping fields stored beside API documents that list, page and export reads must never return
+INTERNAL_FIELDS = {
+    "compliance_reports": ("fingerprints",)
+}
+
+def public_projection(collection: str) -> Dict[str, int]:
+    return {"_id": 0, **{name: 0 for name in INTERNAL_FIELDS.get(collection, ())}}
+
+def encode_cursor(doc: Dict[str, Any], sort_field: Optional[str]) -> str:
+    value = doc.get(sort_field) if sort_field else None
+    if isinstance(value, datetime):
+        value = as_utc(value).isoformat()
+    raw = json.dumps({"v": value, "id": doc["id"]})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str, sort_field: Optional[str]) -> tuple:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        value = datetime.fromisoformat(raw["v"]) if sort_field else None
+        return value, str(raw["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def build_projection(fields: Optional[str], model, sort_field: Optional[str], collection: str) -> Optional[Dict[str, int]]:
+    """Translate fields=a,b into a Mongo projection, keeping the keys the cursor needs"""
+    if not fields:
+        return public_projection(collection)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    if sort_field:
+        requested.add(sort_field)
+    return {"_id": 0, **{name: 1 for name in requested}}
+
+async def fetch_page(collection, query: Dict[str, Any], sort_field: Optional[str], limit: int,
+                     cursor: Optional[str], fields: Optional[str], model) -> Page:
+    """Keyset page over (sort_field desc, id desc), or id asc when there is no sort field"""
+    if sort_field:
+        sort = [(sort_field, -1), ("id", -1)]
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort_field)
+            query = {**query, "$or": [
+                {sort_field: {"$lt": value}},
+                {sort_field: value, "id": {"$lt": last_id}}
+            ]}
+    else:
+        sort = [("id", 1)]
+        if cursor:
+            query = {**query, "id": {"$gt": decode_cursor(cursor, None)[1]}}
     
-    ai_response = await call_ai(prompt, "You are an expert emotion analyst.")
+    projection = build_projection(fields, model, sort_field, collection.name)
+    items = []
+    async for doc in collection.find(query, projection).sort(sort).limit(limit + 1):
+        items.append(doc)
     
-    # Parse AI response (simplified - in production, use structured output)
-    emotions = {
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1], sort_field)
+    if FAST_SERIALIZATION:
+        fields_returned = frozenset(projection) - {"_id"} if fields else None
+        adapter = page_adapter(model, fields_returned)
+        page = adapter.validate_python({"items": items, "next_cursor": next_cursor})
+        return Response(content=adapter.dump_json(page, by_alias=True), media_type="application/json")
+    return Page(items=items, next_cursor=next_cursor)
+
+# ==================== EMOTION & TEAM ROUTES ====================
+
+EMOTION_LABELS = ["joy", "sadness", "anger", "fear", "surprise", "neutral"]
+
+DEFAULT_EMOTION_SCORES = {
+    "emotions": {
         "joy": 0.3,
         "sadness": 0.1,
         "anger": 0.05,
         "fear": 0.05,
         "surprise": 0.2,
         "neutral": 0.3
+    },
+    "dominant_emotion": "joy",
+    "confidence": 0.75
+}
+
+def normalize_emotions(draft: EmotionDraft) -> Dict[str, Any]:
+    """Clamp scores to 0-1 over the known labels and derive a valid dominant emotion"""
+    scores = {key.lower(): value for key, value in draft.emotions.items()}
+    emotions = {label: min(max(float(scores.get(label, 0.0)), 0.0), 1.0) for label in EMOTION_LABELS}
+    dominant = draft.dominant_emotion.lower()
+    return {
+        "emotions": emotions,
+        "dominant_emotion": dominant if dominant in emotions else max(emotions, key=emotions.get),
+        "confidence": min(max(draft.confidence, 0.0), 1.0)
     }
+
+async def run_emotion_analysis(request: EmotionAnalyzeRequest) -> EmotionAnalysis:
+    """Analyze and persist one text"""
+    prompt = f"""Analyze the emotional content of this text and return emotion scores:
+Text: "{request.text}"
+Context: {request.context or 'None'}
+
+Provide scores (0-1) for: joy, sadness, anger, fear, surprise, neutral.
+Identify the dominant emotion and confidence level."""
+    
+    draft = await call_ai_structured(prompt, "You are an expert emotion analyst.", EMOTION_DRAFT_ADAPTER, "emotion")
+    scores = normalize_emotions(draft) if draft else DEFAULT_EMOTION_SCORES
     
     analysis = EmotionAnalysis(
         user_id=request.user_id,
         text=request.text,
-        emotions=emotions,
-        dominant_emotion="joy",
-        confidence=0.75,
-        context=request.context
+        context=request.context,
+        **scores
     )
     
     # Save to DB
-    await db.emotion_analysis.insert_one(analysis.model_dump())
+    await write_buffer.insert("emotion_analysis", analysis.model_dump())
+    await asyncio.gather(
+        record_emotion_rollups([analysis]),
+        record_activity(analysis.user_id, "emotion_analyses", "analysis", "Emotion analysis completed")
+    )
     
     return analysis
 
+@api_router.post("/emotion/analyze", response_model=EmotionAnalysis)
+async def analyze_emotion(request: EmotionAnalyzeRequest, current_user: User = Depends(get_current_user)):
+    """Analyze emotion from text"""
+    return model_response(await run_emotion_analysis(request))
+
+@api_router.post("/emotion/analyze/stream")
+async def analyze_emotion_stream(request: EmotionAnalyzeRequest, current_user: User = Depends(get_current_user)):
+    """Analyze emotion from text, streaming progress as Server-Sent Events"""
+    return sse_response(stream_ai_result(run_emotion_analysis(request), "analysis"))
+
+def parse_emotion_batch(items: Optional[List[Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+    """Validate per-item emotion results, skipping any item that does not conform"""
+    parsed = {}
+    for item in items or []:
+        try:
+            parsed[int(item["index"])] = normalize_emotions(EmotionDraft.model_validate(item))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return parsed
+
+async def analyze_emotion_chunk(offset: int, items: List[EmotionAnalyzeRequest]) -> Dict[int, Dict[str, Any]]:
+    """Analyze a chunk of texts with a single AI call"""
+    lines = "\n".join(
+        f'{offset + i}. Text: {json.dumps(item.text)} Context: {json.dumps(item.context or "None")}'
+        for i, item in enumerate(items)
+    )
+    prompt = f"""Analyze the emotional content of each numbered text below.
+{lines}
+
+Respond with only a JSON array containing one object per text:
+{{"index": <number>, "emotions": {{"joy": 0-1, "sadness": 0-1, "anger": 0-1, "fear": 0-1, "surprise": 0-1, "neutral": 0-1}}, "dominant_emotion": <emotion>, "confidence": 0-1}}"""
+    
+    items = await call_ai_structured(
+        prompt,
+        "You are an expert emotion analyst.",
+        EMOTION_BATCH_ADAPTER,
+        "emotion_batch",
+        describe_schema=False,
+        wait_for_slot=True
+    )
+    return parse_emotion_batch(items)
+
+@api_router.post("/emotion/analyze/batch", response_model=EmotionBatchResult)
+async def analyze_emotion_batch(request: EmotionBatchRequest, current_user: User = Depends(get_current_user)):
+    """Analyze many texts with one AI call per chunk and one bulk insert"""
+    if len(request.items) > EMOTION_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {EMOTION_BATCH_MAX_ITEMS} items")
+    
+    # One batch never holds more chunks in flight than the pool has slots
+    slots = asyncio.Semaphore(llm_pool.max_concurrency)
+    
+    async def run_chunk(offset: int) -> Dict[int, Dict[str, Any]]:
+        async with slots:
+            return await analyze_emotion_chunk(offset, request.items[offset:offset + EMOTION_BATCH_SIZE])
+    
+    offsets = range(0, len(request.items), EMOTION_BATCH_SIZE)
+    chunks = await asyncio.gather(*[run_chunk(offset) for offset in offsets], return_exceptions=True)
+    
+    results = []
+    errors = []
+    for offset, chunk in zip(offsets, chunks):
+        for index in range(offset, min(offset + EMOTION_BATCH_SIZE, len(request.items))):
+            if isinstance(chunk, Exception):
+                detail = chunk.detail if isinstance(chunk, HTTPException) else str(chunk)
+                errors.append(EmotionBatchError(index=index, error=detail))
+                continue
+            if index not in chunk:
+                errors.append(EmotionBatchError(index=index, error="No valid analysis returned for this item"))
+                continue
+            item = request.items[index]
+            results.append(EmotionAnalysis(
+                user_id=item.user_id,
+                text=item.text,
+                context=item.context,
+                **chunk[index]
+            ))
+    
+    if results:
+        await db.emotion_analysis.insert_many([analysis.model_dump() for analysis in results], ordered=False)
+        per_user: Dict[str, int] = {}
+        for analysis in results:
+            per_user[analysis.user_id] = per_user.get(analysis.user_id, 0) + 1
+        await asyncio.gather(
+            record_emotion_rollups(results),
+            *[record_activity(user_id, "emotion_analyses", "analysis", f"Batch emotion analysis completed ({count} texts)", count)
+              for user_id, count in per_user.items()]
+        )
+    
+    return EmotionBatchResult(results=results, errors=errors)
+
 @api_router.get("/emotion/history/{user_id}", response_model=List[EmotionAnalysis])
 async def get_emotion_history(user_id: str, limit: int = 50, current_user: User = Depends(get_current_user)):
     """Get emotion analysis history"""
-    results = await db.emotion_analysis.find(
-        {"user_id": user_id}
+    results = await history_collection("emotion_analysis").find(
+        {"user_id": user_id}, {"_id": 0}
     ).sort("timestamp", -1).limit(limit).to_list(limit)
     
-    return results
+    return list_response(EmotionAnalysis, results)
+
+@api_router.get("/emotion/history/{user_id}/page", response_model=Page)
+async def get_emotion_history_page(user_id: str, cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=PAGE_MAX_LIMIT),
+                                   fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    """Page through emotion analysis history, newest first"""
+    return await fetch_page(history_collection("emotion_analysis"), {"user_id": user_id}, "timestamp", limit, cursor, fields, EmotionAnalysis)
 
 @api_router.post("/team/add-member")
 async def add_team_member(request: AddTeamMemberRequest, current_user: User = Depends(get_current_user)):
@@ -433,25 +2012,108 @@ async def add_team_member(request: AddTeamMemberRequest, current_user: User = De
 @api_router.get("/team/members/{user_id}", response_model=List[TeamMember])
 async def get_team_members(user_id: str, current_user: User = Depends(get_current_user)):
     """Get all team members"""
-    members = await db.team_members.find({"user_id": user_id}).to_list(100)
-    return members
+    members = await history_collection("team_members").find({"user_id": user_id}, {"_id": 0}).to_list(100)
+    return list_response(TeamMember, members)
+
+@api_router.get("/team/members/{user_id}/page", response_model=Page)
+async def get_team_members_page(user_id: str, cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=PAGE_MAX_LIMIT),
+                                fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    """Page through team members"""
+    return await fetch_page(history_collection("team_members"), {"user_id": user_id}, None, limit, cursor, fields, TeamMember)
+
+async def record_emotion_rollups(analyses: List[EmotionAnalysis]):
+    """Fold new analyses into per-user running emotion sums so team metrics never rescan history"""
+    increments: Dict[str, Dict[str, float]] = {}
+    for analysis in analyses:
+        inc = increments.setdefault(analysis.user_id, {"count": 0})
+        inc["count"] += 1
+        for label in EMOTION_LABELS:
+            key = f"sums.{label}"
+            inc[key] = inc.get(key, 0.0) + analysis.emotions.get(label, 0.0)
+    
+    if increments:
+        await db.emotion_rollups.bulk_write([
+            UpdateOne(
+                {"_id": user_id},
+                {"$inc": inc, "$set": {"updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+            for user_id, inc in increments.items()
+        ], ordered=False)
+
+async def rebuild_emotion_rollup(user_id: str) -> Dict[str, Any]:
+    """Recompute a user's emotion rollup from their stored analyses, covering history written before rollups existed"""
+    # Buffered analyses are already in the rollup; write them first so the rebuild counts them too
+    await write_buffer.flush("emotion_analysis")
+    group = {"_id": None, "count": {"$sum": 1}}
+    group.update({label: {"$sum": {"$ifNull": [f"$emotions.{label}", 0.0]}} for label in EMOTION_LABELS})
+    totals = await db.emotion_analysis.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": group}
+    ]).to_list(1)
+    totals = totals[0] if totals else {"count": 0}
+    rollup = {
+        "count": totals["count"],
+        "sums": {label: totals.get(label, 0.0) for label in EMOTION_LABELS},
+        "initialized": True,
+        "updated_at": datetime.now(timezone.utc)
+    }
+    await db.emotion_rollups.update_one({"_id": user_id}, {"$set": rollup}, upsert=True)
+    return rollup
+
+async def load_emotion_rollup(user_id: str) -> Dict[str, Any]:
+    rollup = await db.emotion_rollups.find_one({"_id": user_id})
+    # record_emotion_rollups' upsert can create the document before any rebuild, missing older analyses
+    if not rollup or not rollup.get("initialized"):
+        return await rebuild_emotion_rollup(user_id)
+    return rollup
+
+def clamp_score(value: float) -> float:
+    return round(min(max(value, 0.0), 100.0), 1)
+
+async def compute_team_metrics(team_id: str) -> TeamPerformance:
+    """Score a team from member performance and the team owner's emotion rollup"""
+    members = await db.team_members.aggregate([
+        {"$match": {"user_id": team_id}},
+        {"$group": {
+            "_id": None,
+            "size": {"$sum": 1},
+            "avg_performance": {"$avg": "$performance_score"},
+            "avg_performance_sq": {"$avg": {"$multiply": ["$performance_score", "$performance_score"]}}
+        }}
+    ]).to_list(1)
+    members = members[0] if members else {"size": 0, "avg_performance": 0.0, "avg_performance_sq": 0.0}
+    
+    # Team members are roster entries, not app users, so they own no analyses: morale and burnout
+    # reflect only the analyses the team owner recorded
+    rollup = await load_emotion_rollup(team_id)
+    count = rollup["count"]
+    means = {label: rollup["sums"].get(label, 0.0) / count if count else 0.0 for label in EMOTION_LABELS}
+    positive = means["joy"] + 0.5 * means["surprise"]
+    negative = means["sadness"] + means["anger"] + means["fear"]
+    
+    productivity = members["avg_performance"] or 0.0
+    variance = max((members["avg_performance_sq"] or 0.0) - productivity ** 2, 0.0)
+    spread = variance ** 0.5 / productivity if productivity else 1.0
+    collaboration = 100.0 * (1.0 - min(spread, 1.0)) if members["size"] else 0.0
+    morale = 100.0 * (0.5 + 0.5 * (positive - negative))
+    burnout = 100.0 * (0.7 * min(negative, 1.0) + 0.3 * (1.0 - collaboration / 100.0))
+    
+    return TeamPerformance(
+        team_id=team_id,
+        productivity_score=clamp_score(productivity),
+        collaboration_level=clamp_score(collaboration),
+        morale=clamp_score(morale),
+        burnout_risk=clamp_score(burnout),
+        team_size=members["size"]
+    )
 
 @api_router.post("/team/analyze", response_model=TeamPerformance)
 async def analyze_team_performance(request: TeamAnalyzeRequest, current_user: User = Depends(get_current_user)):
     """Analyze team performance"""
-    # Get team members
-    members = await db.team_members.find({"user_id": request.team_id}).to_list(100)
-    
-    performance = TeamPerformance(
-        team_id=request.team_id,
-        productivity_score=85.0,
-        collaboration_level=78.0,
-        morale=72.0,
-        burnout_risk=35.0,
-        team_size=len(members)
-    )
+    performance = await compute_team_metrics(request.team_id)
     
-    await db.team_performance.insert_one(performance.model_dump())
+    await write_buffer.insert("team_performance", performance.model_dump())
     return performance
 
 @api_router.get("/team/recommendations/{team_id}", response_model=List[PerformanceRecommendation])
@@ -477,9 +2139,34 @@ async def get_team_recommendations(team_id: str, current_user: User = Depends(ge
 
 # ==================== PERSONA GENERATOR ROUTES ====================
 
-@api_router.post("/persona/generate", response_model=ClientPersona)
-async def generate_persona(request: GeneratePersonaRequest, current_user: User = Depends(get_current_user)):
-    """Generate client persona"""
+DEFAULT_PERSONA_DRAFT = PersonaDraft(
+    name="Sarah Johnson",
+    title="Director of Operations",
+    company="TechCorp Solutions",
+    pain_points=[
+        "Manual processes consuming too much time",
+        "Difficulty scaling operations",
+        "Data silos across departments"
+    ],
+    goals=[
+        "Automate 50% of manual tasks",
+        "Improve team productivity by 30%",
+        "Centralize data management"
+    ],
+    decision_style="Data-driven with focus on ROI",
+    stakeholders=[
+        Stakeholder(
+            name="John Smith",
+            role="CTO",
+            influence_level=85,
+            concerns=["Technical integration", "Security"]
+        )
+    ],
+    confidence_score=0.82
+)
+
+async def run_persona_generation(request: GeneratePersonaRequest) -> ClientPersona:
+    """Generate and persist one client persona"""
     prompt = f"""Generate a detailed B2B client persona for:
 Industry: {request.industry}
 Company Size: {request.company_size}
@@ -488,172 +2175,912 @@ Context: {request.context or 'None'}
 
 Include: name, title, company details, 3-5 pain points, goals, decision style, and key stakeholders."""
     
-    ai_response = await call_ai(prompt, "You are an expert B2B persona strategist.")
+    draft = await call_ai_structured(prompt, "You are an expert B2B persona strategist.", PERSONA_DRAFT_ADAPTER, "persona")
     
-    # Create persona (simplified)
     persona = ClientPersona(
-        name="Sarah Johnson",
-        title="Director of Operations",
-        company="TechCorp Solutions",
         industry=request.industry,
         company_size=request.company_size,
         budget_range=request.budget_range,
-        pain_points=[
-            "Manual processes consuming too much time",
-            "Difficulty scaling operations",
-            "Data silos across departments"
-        ],
-        goals=[
-            "Automate 50% of manual tasks",
-            "Improve team productivity by 30%",
-            "Centralize data management"
-        ],
-        decision_style="Data-driven with focus on ROI",
-        stakeholders=[
-            Stakeholder(
-                name="John Smith",
-                role="CTO",
-                influence_level=85,
-                concerns=["Technical integration", "Security"]
-            )
-        ],
-        confidence_score=0.82,
-        user_id=request.user_id
+        user_id=request.user_id,
+        **(draft or DEFAULT_PERSONA_DRAFT).model_dump()
     )
     
-    await db.personas.insert_one(persona.model_dump())
+    await write_buffer.insert("personas", persona.model_dump())
+    await record_activity(persona.user_id, "personas", "persona", f"Persona generated: {persona.name}")
     return persona
 
+@api_router.post("/persona/generate", response_model=ClientPersona)
+async def generate_persona(request: GeneratePersonaRequest, current_user: User = Depends(get_current_user)):
+    """Generate client persona"""
+    return model_response(await run_persona_generation(request))
+
+@api_router.post("/persona/generate/stream")
+async def generate_persona_stream(request: GeneratePersonaRequest, current_user: User = Depends(get_current_user)):
+    """Generate client persona, streaming progress and fields as Server-Sent Events"""
+    return sse_response(stream_ai_result(run_persona_generation(request), "persona"))
+
 @api_router.get("/persona/all/{user_id}", response_model=List[ClientPersona])
 async def get_all_personas(user_id: str, current_user: User = Depends(get_current_user)):
     """Get all personas for user"""
-    personas = await db.personas.find({"user_id": user_id}).to_list(100)
-    return personas
+    personas = await history_collection("personas").find({"user_id": user_id}, {"_id": 0}).to_list(100)
+    return list_response(ClientPersona, personas)
+
+@api_router.get("/persona/all/{user_id}/page", response_model=Page)
+async def get_personas_page(user_id: str, cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=PAGE_MAX_LIMIT),
+                            fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    """Page through personas, newest first"""
+    return await fetch_page(history_collection("personas"), {"user_id": user_id}, "created_at", limit, cursor, fields, ClientPersona)
 
 @api_router.delete("/persona/{persona_id}")
 async def delete_persona(persona_id: str, current_user: User = Depends(get_current_user)):
     """Delete persona"""
-    result = await db.personas.delete_one({"id": persona_id})
-    if result.deleted_count == 0:
+    deleted = await db.personas.find_one_and_delete({"id": persona_id}, {"_id": 0, "user_id": 1})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Persona not found")
+    await decrement_counter(deleted["user_id"], "personas")
     return {"success": True}
 
 # ==================== FUNDING & COMPLIANCE ROUTES ====================
 
+# Served when no catalogue has been loaded into funding_opportunities
+DEFAULT_FUNDING_CATALOGUE = [
+    {
+        "id": "default-small-business-innovation-grant",
+        "name": "Small Business Innovation Grant",
+        "type": "grant",
+        "amount_min": 25000,
+        "amount_max": 100000,
+        "provider": "State Economic Development",
+        "eligibility": ["Registered business", "< 50 employees", "Technology sector"],
+        "deadline": "2025-12-31",
+        "requirements": ["Business plan", "Financial statements", "Pitch deck"],
+        "application_url": "https://example.com/apply",
+        "criteria": {"industries": ["technology"], "max_employees": 49, "needs": ["grant", "innovation", "r&d"]}
+    },
+    {
+        "id": "default-growth-capital-loan",
+        "name": "Growth Capital Loan",
+        "type": "loan",
+        "amount_min": 50000,
+        "amount_max": 500000,
+        "provider": "Regional Development Bank",
+        "eligibility": ["2+ years in business", "Positive cash flow"],
+        "deadline": None,
+        "requirements": ["Credit check", "Collateral", "Business financials"],
+        "application_url": "https://example.com/loan",
+        "criteria": {"stages": ["growth", "established"], "needs": ["loan", "working capital", "expansion"]}
+    }
+]
+
+# Employee-count bands used to pre-filter by company size
+EMPLOYEE_BANDS = [0, 10, 50, 250, 1000]
+
+def employee_band(count: int) -> int:
+    band = 0
+    for index, lower in enumerate(EMPLOYEE_BANDS):
+        if count >= lower:
+            band = index
+    return band
+
+def bits_to_mask(bits: int, size: int) -> np.ndarray:
+    raw = np.frombuffer(bits.to_bytes((size + 7) // 8 or 1, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little", count=size).astype(bool)
+
+class FundingMatcher(WatchedIndex):
+    """Eligibility bitset index over the funding catalogue with vectorized ranking"""
+
+    DIMENSIONS = ("industries", "stages", "locations")
+    WEIGHTS = {"needs": 45.0, "industries": 20.0, "stages": 15.0, "locations": 10.0, "size": 10.0}
+    STATE = ("opportunities", "ids", "bits", "band_bits", "need_bits", "min_employees", "max_employees")
+
+    def __init__(self):
+        self.reset()
+        self.refreshes = 0
+
+    def reset(self):
+        self.opportunities: List[Dict[str, Any]] = []
+        self.ids: set = set()
+        # dimension -> value -> bitset of opportunities listing it; "*" holds opportunities open to any value
+        self.bits: Dict[str, Dict[str, int]] = {dimension: {"*": 0} for dimension in self.DIMENSIONS}
+        self.band_bits = [0] * len(EMPLOYEE_BANDS)
+        self.need_bits: Dict[str, int] = {}
+        self.min_employees = array("d")
+        self.max_employees = array("d")
+
+    def add(self, opportunity: Dict[str, Any]):
+        position = len(self.opportunities)
+        bit = 1 << position
+        criteria = FundingCriteria(**opportunity.get("criteria", {}))
+        self.opportunities.append(opportunity)
+        self.ids.add(opportunity["id"])
+        
+        for dimension in self.DIMENSIONS:
+            values = [value.lower() for value in getattr(criteria, dimension)] or ["*"]
+            for value in values:
+                self.bits[dimension][value] = self.bits[dimension].get(value, 0) | bit
+        
+        max_employees = criteria.max_employees if criteria.max_employees is not None else math.inf
+        for band, lower in enumerate(EMPLOYEE_BANDS):
+            upper = EMPLOYEE_BANDS[band + 1] - 1 if band + 1 < len(EMPLOYEE_BANDS) else math.inf
+            if criteria.min_employees <= upper and max_employees >= lower:
+                self.band_bits[band] |= bit
+        self.min_employees.append(criteria.min_employees)
+        self.max_employees.append(max_employees)
+        
+        for need in criteria.needs:
+            self.need_bits[need.lower()] = self.need_bits.get(need.lower(), 0) | bit
+
+    def search(self, request: FundingSearchRequest, limit: int) -> List[FundingOpportunity]:
+        size = len(self.opportunities)
+        if not size:
+            return []
+        
+        locations = {request.location.lower()} | {part.strip().lower() for part in request.location.split(",")}
+        requested = {
+            "industries": {request.industry.lower()},
+            "stages": {request.stage.lower()},
+            "locations": locations
+        }
+        
+        eligible = self.band_bits[employee_band(request.employee_count)]
+        specific = {}
+        for dimension, values in requested.items():
+            listed = 0
+            for value in values:
+                listed |= self.bits[dimension].get(value, 0)
+            specific[dimension] = listed
+            eligible &= listed | self.bits[dimension]["*"]
+        
+        # Bands are coarse; apply the exact employee range to the survivors
+        mask = bits_to_mask(eligible, size)
+        mask &= np.frombuffer(self.min_employees, dtype=np.float64) <= request.employee_count
+        mask &= np.frombuffer(self.max_employees, dtype=np.float64) >= request.employee_count
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+        
+        scores = np.full(len(candidates), self.WEIGHTS["size"])
+        for dimension in self.DIMENSIONS:
+            scores += self.WEIGHTS[dimension] * bits_to_mask(specific[dimension], size)[candidates]
+        needs = {need.lower() for need in request.needs}
+        if needs:
+            matched = np.zeros(len(candidates))
+            for need in needs:
+                matched += bits_to_mask(self.need_bits.get(need, 0), size)[candidates]
+            scores += self.WEIGHTS["needs"] * matched / len(needs)
+        
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [
+            FundingOpportunity(**self.opportunities[candidates[index]], match_score=round(float(scores[index]), 1))
+            for index in order
+        ]
+
+    async def load(self):
+        self.reset()
+        async for doc in db.funding_opportunities.find({}, {"_id": 0}).batch_size(1000):
+            self.add(doc)
+        if not self.opportunities:
+            for doc in DEFAULT_FUNDING_CATALOGUE:
+                self.add(doc)
+
+    @property
+    def serving_defaults(self) -> bool:
+        return bool(self.opportunities) and self.opportunities[0]["id"].startswith("default-")
+
+    async def refresh(self):
+        """Load the catalogue into a fresh index and swap it in, so searches never see a partial load"""
+        fresh = FundingMatcher()
+        await fresh.load()
+        for name in self.STATE:
+            setattr(self, name, getattr(fresh, name))
+        self.refreshes += 1
+
+    async def apply_change(self, change: Dict[str, Any]):
+        # Bitsets are positional, so only appends apply in place; edits and deletes rebuild
+        if change["operationType"] == "insert" and not self.serving_defaults:
+            doc = change["fullDocument"]
+            doc.pop("_id", None)
+            if doc["id"] not in self.ids:
+                self.add(doc)
+        else:
+            await self.refresh()
+
+    async def watch(self):
+        await watch_collection("funding_opportunities", self.apply_change, self.refresh, lambda: FUNDING_POLL_INTERVAL, "Funding")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"opportunities": len(self.opportunities), "defaults": self.serving_defaults, "refreshes": self.refreshes}
+
+funding_matcher = FundingMatcher()
+
 @api_router.post("/funding/search", response_model=List[FundingOpportunity])
-async def search_funding(request: FundingSearchRequest, current_user: User = Depends(get_current_user)):
+async def search_funding(request: FundingSearchRequest, limit: int = Query(20, ge=1, le=200),
+                         current_user: User = Depends(get_current_user)):
     """Search for funding opportunities"""
-    opportunities = [
-        FundingOpportunity(
-            name="Small Business Innovation Grant",
-            type="grant",
-            amount_min=25000,
-            amount_max=100000,
-            provider="State Economic Development",
-            eligibility=["Registered business", "< 50 employees", "Technology sector"],
-            match_score=87.5,
-            deadline="2025-12-31",
-            requirements=["Business plan", "Financial statements", "Pitch deck"],
-            application_url="https://example.com/apply"
-        ),
-        FundingOpportunity(
-            name="Growth Capital Loan",
-            type="loan",
-            amount_min=50000,
-            amount_max=500000,
-            provider="Regional Development Bank",
-            eligibility=["2+ years in business", "Positive cash flow"],
-            match_score=72.0,
-            deadline=None,
-            requirements=["Credit check", "Collateral", "Business financials"],
-            application_url="https://example.com/loan"
+    return funding_matcher.search(request, limit)
+
+@api_router.post("/funding/opportunities")
+async def add_funding_opportunities(request: List[AddFundingOpportunityRequest], current_user: User = Depends(get_current_user)):
+    """Add opportunities to the funding catalogue"""
+    docs = [{"id": str(uuid.uuid4()), **opportunity.model_dump()} for opportunity in request]
+    if docs:
+        await db.funding_opportunities.insert_many([dict(doc) for doc in docs], ordered=False)
+        # The first stored opportunity replaces the built-in defaults; other workers catch up through their watcher
+        if funding_matcher.serving_defaults:
+            await funding_matcher.refresh()
+        else:
+            for doc in docs:
+                if doc["id"] not in funding_matcher.ids:
+                    funding_matcher.add(doc)
+    return {"success": True, "added": len(docs)}
+
+# Declarative compliance rules. "when" narrows a rule to matching profiles (missing key = any value);
+# each applicable rule deducts its penalty from the category's 100-point score.
+COMPLIANCE_RULES = [
+    {
+        "category": "Data Privacy",
+        "penalty": 8,
+        "recommendations": ["Update privacy policy annually"]
+    },
+    {
+        "category": "Data Privacy",
+        "when": {"location": ["eu", "europe", "germany", "france", "spain", "italy", "netherlands", "ireland"]},
+        "penalty": 10,
+        "issue": "GDPR records of processing activities not verified",
+        "recommendations": ["Maintain a record of processing activities", "Appoint a data protection contact"]
+    },
+    {
+        "category": "Data Privacy",
+        "when": {"location": ["california", "ca"]},
+        "penalty": 6,
+        "issue": "CCPA consumer request workflow not documented",
+        "recommendations": ["Publish a 'Do Not Sell or Share' notice"]
+    },
+    {
+        "category": "Data Privacy",
+        "when": {"industry": ["healthcare", "health"]},
+        "penalty": 15,
+        "issue": "HIPAA safeguards for patient data not evidenced",
+        "recommendations": ["Complete a HIPAA security risk assessment", "Sign business associate agreements with vendors"]
+    },
+    {
+        "category": "Employment Law",
+        "penalty": 25,
+        "issue": "Missing harassment training records",
+        "recommendations": ["Schedule annual training", "Update employee handbook"]
+    },
+    {
+        "category": "Employment Law",
+        "when": {"size": ["medium", "large"]},
+        "penalty": 8,
+        "issue": "Family and medical leave policy not published",
+        "recommendations": ["Publish a leave policy covering statutory entitlements"]
+    },
+    {
+        "category": "Financial Reporting",
+        "when": {"industry": ["finance", "fintech", "banking", "insurance"]},
+        "penalty": 20,
+        "issue": "Internal controls over financial reporting not documented",
+        "recommendations": ["Document key financial controls", "Schedule an external audit"]
+    },
+    {
+        "category": "Health & Safety",
+        "when": {"industry": ["manufacturing", "construction", "logistics"]},
+        "penalty": 18,
+        "issue": "Workplace hazard assessment is overdue",
+        "recommendations": ["Run a site hazard assessment", "Refresh safety training logs"]
+    }
+]
+
+PROFILE_ATTRIBUTES = ("industry", "location", "size")
+
+def size_band(size: str) -> str:
+    """Normalize free-form company size ("11-50", "Small", "250+") to small/medium/large"""
+    digits = re.findall(r"\d+", size)
+    if digits:
+        employees = int(digits[-1])
+        return "small" if employees < 50 else "medium" if employees < 250 else "large"
+    lowered = size.lower()
+    return next((band for band in ("small", "medium", "large") if band in lowered), "small")
+
+def compliance_profile(request: ComplianceCheckRequest) -> Dict[str, Any]:
+    return {
+        "industry": request.industry.strip().lower(),
+        "location": frozenset([request.location.strip().lower()] + [part.strip().lower() for part in request.location.split(",")]),
+        "size": size_band(request.size)
+    }
+
+def compliance_status(score: float) -> str:
+    return "compliant" if score >= 85 else "warning" if score >= 65 else "non-compliant"
+
+class ComplianceRuleEngine:
+    """Compiles declarative rules once into per-category evaluation plans"""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.plans: Dict[str, List[tuple]] = {}
+        self.dependencies: Dict[str, set] = {}
+        self.versions: Dict[str, str] = {}
+        for rule in rules:
+            conditions = {attribute: frozenset(values) for attribute, values in rule.get("when", {}).items()}
+            self.plans.setdefault(rule["category"], []).append((conditions, rule))
+            self.dependencies.setdefault(rule["category"], set()).update(conditions)
+        for category, plan in self.plans.items():
+            raw = json.dumps([rule for _, rule in plan], sort_keys=True)
+            self.versions[category] = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+        self.evaluated = 0
+        self.reused = 0
+
+    @staticmethod
+    def matches(conditions: Dict[str, frozenset], profile: Dict[str, Any]) -> bool:
+        for attribute, allowed in conditions.items():
+            value = profile[attribute]
+            if isinstance(value, frozenset) and not value & allowed:
+                return False
+            if not isinstance(value, frozenset) and value not in allowed:
+                return False
+        return True
+
+    def fingerprint(self, category: str, profile: Dict[str, Any]) -> str:
+        """Identifies a category's result: rule version plus only the profile attributes it reads"""
+        relevant = {attribute: sorted(profile[attribute]) if isinstance(profile[attribute], frozenset) else profile[attribute]
+                    for attribute in sorted(self.dependencies[category])}
+        return f"{self.versions[category]}:{json.dumps(relevant, sort_keys=True)}"
+
+    @functools.lru_cache(maxsize=COMPLIANCE_CACHE_SIZE)
+    def evaluate(self, category: str, fingerprint: str, profile_key: tuple) -> ComplianceCheck:
+        profile = dict(zip(PROFILE_ATTRIBUTES, profile_key))
+        score = 100.0
+        issues: List[str] = []
+        recommendations: List[str] = []
+        for conditions, rule in self.plans[category]:
+            if self.matches(conditions, profile):
+                score -= rule["penalty"]
+                if rule.get("issue"):
+                    issues.append(rule["issue"])
+                recommendations.extend(rule.get("recommendations", []))
+        score = max(score, 0.0)
+        return ComplianceCheck(
+            category=category,
+            status=compliance_status(score),
+            score=score,
+            issues=issues,
+            recommendations=recommendations
         )
-    ]
-    return opportunities
+
+    def check(self, profile: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> tuple:
+        """Evaluate every category, reusing the previous report's result where its fingerprint is unchanged"""
+        previous_fingerprints = (previous or {}).get("fingerprints", {})
+        previous_checks = {check["category"]: check for check in (previous or {}).get("checks", [])}
+        profile_key = tuple(profile[attribute] for attribute in PROFILE_ATTRIBUTES)
+        
+        checks = []
+        fingerprints = {}
+        for category in self.plans:
+            fingerprint = self.fingerprint(category, profile)
+            fingerprints[category] = fingerprint
+            if previous_fingerprints.get(category) == fingerprint and category in previous_checks:
+                self.reused += 1
+                checks.append(ComplianceCheck(**previous_checks[category]))
+                continue
+            self.evaluated += 1
+            check = self.evaluate(category, fingerprint, profile_key)
+            checks.append(check.model_copy(deep=True))
+        
+        # Categories with no applicable rule are not reported
+        checks = [check for check in checks if check.score < 100.0 or check.recommendations]
+        return checks, fingerprints
+
+    def stats(self) -> Dict[str, Any]:
+        cache = self.evaluate.cache_info()
+        return {
+            "categories": len(self.plans),
+            "rules": sum(len(plan) for plan in self.plans.values()),
+            "evaluated": self.evaluated,
+            "reused_from_previous": self.reused,
+            "memo_hits": cache.hits,
+            "memo_misses": cache.misses
+        }
+
+compliance_engine = ComplianceRuleEngine(COMPLIANCE_RULES)
 
 @api_router.post("/compliance/check", response_model=ComplianceReport)
 async def check_compliance(request: ComplianceCheckRequest, current_user: User = Depends(get_current_user)):
     """Run compliance check"""
-    checks = [
-        ComplianceCheck(
-            category="Data Privacy",
-            status="compliant",
-            score=92.0,
-            issues=[],
-            recommendations=["Update privacy policy annually"]
-        ),
-        ComplianceCheck(
-            category="Employment Law",
-            status="warning",
-            score=75.0,
-            issues=["Missing harassment training records"],
-            recommendations=["Schedule annual training", "Update employee handbook"]
-        )
-    ]
+    previous = await db.compliance_reports.find_one(
+        {"user_id": request.user_id},
+        {"_id": 0, "checks": 1, "fingerprints": 1},
+        sort=[("timestamp", -1), ("id", -1)]
+    )
+    checks, fingerprints = compliance_engine.check(compliance_profile(request), previous)
     
     report = ComplianceReport(
         checks=checks,
-        overall_score=83.5,
+        overall_score=round(sum(check.score for check in checks) / len(checks), 1) if checks else 100.0,
         user_id=request.user_id
     )
     
-    await db.compliance_reports.insert_one(report.model_dump())
-    return report
+    await write_buffer.insert("compliance_reports", {**report.model_dump(), "fingerprints": fingerprints})
+    await record_activity(report.user_id, "compliance_reports", "compliance", f"Compliance check completed: {report.overall_score:.0f}/100")
+    return model_response(report)
 
 @api_router.get("/compliance/history/{user_id}", response_model=List[ComplianceReport])
 async def get_compliance_history(user_id: str, current_user: User = Depends(get_current_user)):
     """Get compliance check history"""
-    reports = await db.compliance_reports.find({"user_id": user_id}).sort("timestamp", -1).to_list(50)
-    return reports
+    reports = await history_collection("compliance_reports").find({"user_id": user_id}, public_projection("compliance_reports")).sort("timestamp", -1).to_list(50)
+    return list_response(ComplianceReport, reports)
+
+@api_router.get("/compliance/history/{user_id}/page", response_model=Page)
+async def get_compliance_history_page(user_id: str, cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=PAGE_MAX_LIMIT),
+                                      fields: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    """Page through compliance reports, newest first"""
+    return await fetch_page(history_collection("compliance_reports"), {"user_id": user_id}, "timestamp", limit, cursor, fields, ComplianceReport)
 
 # ==================== BUSINESS DNA ROUTES ====================
 
+PERSONALITY_TRAITS = list(PersonalityMetrics.model_fields)
+DNA_DRAFT_ADAPTER = TypeAdapter(DNADraft)
+
+DEFAULT_DNA_DRAFT = DNADraft(
+    personality=PersonalityMetrics(
+        innovation_index=78.0,
+        risk_tolerance=65.0,
+        customer_centricity=88.0,
+        data_orientation=72.0,
+        agility=80.0
+    ),
+    swot=SWOTAnalysis(
+        strengths=["Strong customer base", "Innovative product"],
+        weaknesses=["Limited resources", "Small team"],
+        opportunities=["Market expansion", "New partnerships"],
+        threats=["Competition", "Economic uncertainty"]
+    ),
+    preferences={
+        "communication_style": "casual",
+        "decision_speed": "moderate",
+        "growth_strategy": "organic"
+    }
+)
+
+def personality_vector(personality: Dict[str, float]) -> List[float]:
+    return [min(max(float(personality.get(trait, 0.0)), 0.0), 100.0) for trait in PERSONALITY_TRAITS]
+
+class DnaSimilarityIndex(WatchedIndex):
+    """Nearest-neighbour index over each user's latest personality vector.
+
+    Brute-force NumPy distances up to DNA_ANN_THRESHOLD profiles; above that, random-projection
+    LSH tables narrow the candidates before exact re-ranking.
+    """
+
+    MAX_DISTANCE = math.sqrt(len(PERSONALITY_TRAITS)) * 100.0
+
+    def __init__(self, threshold: int, tables: int, bits: int):
+        self.threshold = threshold
+        self.profiles: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}
+        self.vectors = np.zeros((1024, len(PERSONALITY_TRAITS)), dtype=np.float32)
+        rng = np.random.default_rng(17)
+        self.planes = rng.standard_normal((tables, bits, len(PERSONALITY_TRAITS))).astype(np.float32)
+        self.buckets: Optional[List[Dict[int, set]]] = None
+        self.keys: List[np.ndarray] = []
+        self.refreshes = 0
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def _hash(self, vector: np.ndarray) -> np.ndarray:
+        # Centre on the scale midpoint so hyperplanes through the origin split the space evenly
+        signs = (self.planes @ (vector - 50.0)) > 0
+        return signs.astype(np.int64) @ (1 << np.arange(signs.shape[1], dtype=np.int64))
+
+    def _bucket(self, position: int, add: bool):
+        for table, key in enumerate(self.keys[position]):
+            if add:
+                self.buckets[table].setdefault(int(key), set()).add(position)
+            else:
+                self.buckets[table][int(key)].discard(position)
+
+    def _build_lsh(self):
+        self.buckets = [{} for _ in range(self.planes.shape[0])]
+        self.keys = [self._hash(self.vectors[position]) for position in range(len(self.profiles))]
+        for position in range(len(self.profiles)):
+            self._bucket(position, add=True)
+
+    def upsert(self, profile: Dict[str, Any]):
+        """Index a user's profile, replacing their previous one"""
+        vector = np.asarray(profile["personality_vector"], dtype=np.float32)
+        position = self.positions.get(profile["user_id"])
+        if position is None:
+            position = len(self.profiles)
+            self.positions[profile["user_id"]] = position
+            self.profiles.append(profile)
+            if position >= self.vectors.shape[0]:
+                self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+            if self.buckets is not None:
+                self.keys.append(None)
+        else:
+            self.profiles[position] = profile
+            if self.buckets is not None:
+                self._bucket(position, add=False)
+        self.vectors[position] = vector
+        
+        if self.buckets is not None:
+            self.keys[position] = self._hash(vector)
+            self._bucket(position, add=True)
+        elif len(self.profiles) > self.threshold:
+            self._build_lsh()
+
+    def nearest(self, user_id: str, limit: int) -> List[SimilarBusiness]:
+        position = self.positions.get(user_id)
+        if position is None:
+            return []
+        query = self.vectors[position]
+        
+        if self.buckets is None:
+            candidates = np.arange(len(self.profiles))
+        else:
+            found = set()
+            for table, key in enumerate(self._hash(query)):
+                found |= self.buckets[table].get(int(key), set())
+            candidates = np.fromiter(found, dtype=np.int64, count=len(found))
+        candidates = candidates[candidates != position]
+        if not len(candidates):
+            return []
+        
+        distances = np.linalg.norm(self.vectors[candidates] - query, axis=1)
+        if len(candidates) > limit:
+            keep = np.argpartition(distances, limit - 1)[:limit]
+            candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return [
+            SimilarBusiness(
+                dna_id=self.profiles[candidates[index]]["id"],
+                user_id=self.profiles[candidates[index]]["user_id"],
+                company_name=self.profiles[candidates[index]]["company_name"],
+                industry=self.profiles[candidates[index]]["industry"],
+                stage=self.profiles[candidates[index]]["stage"],
+                similarity=round(1.0 - float(distances[index]) / self.MAX_DISTANCE, 4)
+            )
+            for index in order
+        ]
+
+    @staticmethod
+    def profile(doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": doc["id"],
+            "user_id": doc["user_id"],
+            "company_name": doc["company_name"],
+            "industry": doc["industry"],
+            "stage": doc["stage"],
+            "personality_vector": personality_vector(doc["personality"])
+        }
+
+    async def load(self):
+        """Index the latest profile of every user"""
+        pipeline = [
+            {"$sort": {"user_id": 1, "created_at": -1, "id": -1}},
+            {"$group": {
+                "_id": "$user_id",
+                "id": {"$first": "$id"},
+                "company_name": {"$first": "$company_name"},
+                "industry": {"$first": "$industry"},
+                "stage": {"$first": "$stage"},
+                "personality": {"$first": "$personality"}
+            }}
+        ]
+        async for doc in db.business_dna.aggregate(pipeline):
+            doc["user_id"] = doc.pop("_id")
+            self.upsert(self.profile(doc))
+
+    async def refresh(self):
+        """Rebuild from the collection and swap it in, dropping users whose profiles are gone"""
+        fresh = DnaSimilarityIndex(self.threshold, self.planes.shape[0], self.planes.shape[1])
+        await fresh.load()
+        self.profiles, self.positions, self.vectors = fresh.profiles, fresh.positions, fresh.vectors
+        self.buckets, self.keys = fresh.buckets, fresh.keys
+        self.refreshes += 1
+
+    async def apply_change(self, change: Dict[str, Any]):
+        # Profiles are only ever added, so an insert is its user's latest; anything else rebuilds
+        if change["operationType"] == "insert":
+            self.upsert(self.profile(change["fullDocument"]))
+        else:
+            await self.refresh()
+
+    async def watch(self):
+        await watch_collection("business_dna", self.apply_change, self.refresh, lambda: DNA_POLL_INTERVAL, "Business DNA")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"profiles": len(self), "approximate": self.buckets is not None, "refreshes": self.refreshes}
+
+dna_index = DnaSimilarityIndex(DNA_ANN_THRESHOLD, DNA_LSH_TABLES, DNA_LSH_BITS)
+
 @api_router.post("/dna/generate", response_model=BusinessDNA)
 async def generate_business_dna(request: GenerateDNARequest, current_user: User = Depends(get_current_user)):
     """Generate business DNA profile"""
+    prompt = f"""Build a business DNA profile for:
+Company: {request.company_name}
+Industry: {request.industry}
+Stage: {request.stage}
+Size: {request.size}
+Values: {', '.join(request.values) or 'None'}
+Challenges: {', '.join(request.challenges) or 'None'}
+
+Score each personality trait from 0 to 100, give a SWOT analysis with 2-4 items per quadrant,
+and describe communication_style, decision_speed and growth_strategy preferences."""
+    
+    draft = await call_ai_structured(prompt, "You are an expert business strategist.", DNA_DRAFT_ADAPTER, "business_dna")
+    draft = draft or DEFAULT_DNA_DRAFT
+    
     dna = BusinessDNA(
         company_id=str(uuid.uuid4()),
         company_name=request.company_name,
         industry=request.industry,
         stage=request.stage,
-        personality=PersonalityMetrics(
-            innovation_index=78.0,
-            risk_tolerance=65.0,
-            customer_centricity=88.0,
-            data_orientation=72.0,
-            agility=80.0
-        ),
-        swot=SWOTAnalysis(
-            strengths=["Strong customer base", "Innovative product"],
-            weaknesses=["Limited resources", "Small team"],
-            opportunities=["Market expansion", "New partnerships"],
-            threats=["Competition", "Economic uncertainty"]
-        ),
-        preferences={
-            "communication_style": "casual",
-            "decision_speed": "moderate",
-            "growth_strategy": "organic"
-        },
+        personality=draft.personality,
+        swot=draft.swot,
+        preferences=draft.preferences,
         user_id=request.user_id
     )
     
-    await db.business_dna.insert_one(dna.model_dump())
+    doc = {**dna.model_dump(), "personality_vector": personality_vector(draft.personality.model_dump())}
+    await write_buffer.insert("business_dna", dict(doc))
+    dna_index.upsert(doc)
+    await record_activity(dna.user_id, "dna_profiles", "analysis", f"Business DNA generated for {dna.company_name}")
     return dna
 
 @api_router.get("/dna/{user_id}", response_model=BusinessDNA)
 async def get_business_dna(user_id: str, current_user: User = Depends(get_current_user)):
     """Get business DNA profile"""
-    dna = await db.business_dna.find_one({"user_id": user_id})
+    dna = await db.business_dna.find_one({"user_id": user_id}, sort=[("created_at", -1), ("id", -1)])
     if not dna:
         raise HTTPException(status_code=404, detail="Business DNA not found")
     return dna
 
+@api_router.get("/dna/{user_id}/similar", response_model=List[SimilarBusiness])
+async def get_similar_businesses(user_id: str, limit: int = Query(10, ge=1, le=100),
+                                 current_user: User = Depends(get_current_user)):
+    """Find companies whose latest DNA profile is closest to this user's"""
+    if user_id not in dna_index.positions:
+        raise HTTPException(status_code=404, detail="Business DNA not found")
+    return dna_index.nearest(user_id, limit)
+
+# ==================== KNOWLEDGE BASE SEARCH ====================
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class KnowledgeSearchIndex(WatchedIndex):
+    """In-process BM25 inverted index over articles, with optional embedding similarity"""
+
+    FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "content": 1.0}
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, embedder=None):
+        self.embedder = embedder
+        self.articles: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}
+        # term -> parallel append-only arrays of article positions and weighted term frequencies
+        self.postings: Dict[str, tuple] = {}
+        # term -> live articles containing it; postings also hold tombstoned positions until compaction
+        self.doc_freq: Counter = Counter()
+        self.lengths = array("f")
+        self.alive = array("b")
+        self.total_length = 0.0
+        self.vectors: Optional[np.ndarray] = None
+        self.searches = 0
+        self.search_time = 0.0
+        self.refreshes = 0
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def term_frequencies(self, article: Dict[str, Any]) -> Counter:
+        frequencies: Counter = Counter()
+        for field, weight in self.FIELD_WEIGHTS.items():
+            value = article.get(field) or ""
+            for term in tokenize(" ".join(value) if isinstance(value, list) else value):
+                frequencies[term] += weight
+        return frequencies
+
+    def add(self, article: Dict[str, Any], vector: Optional[np.ndarray] = None):
+        # Re-indexing an article tombstones its previous position
+        self._tombstone(article["id"])
+        
+        position = len(self.articles)
+        self.articles.append(article)
+        self.positions[article["id"]] = position
+        
+        frequencies = self.term_frequencies(article)
+        for term, frequency in frequencies.items():
+            positions, weights = self.postings.setdefault(term, (array("i"), array("f")))
+            positions.append(position)
+            weights.append(frequency)
+        self.doc_freq.update(frequencies.keys())
+        
+        length = float(sum(frequencies.values()))
+        self.lengths.append(length)
+        self.alive.append(1)
+        self.total_length += length
+        
+        if vector is not None:
+            self._add_vector(position, vector)
+
+    def _tombstone(self, article_id: str):
+        position = self.positions.pop(article_id, None)
+        if position is None:
+            return
+        self.alive[position] = 0
+        self.total_length -= self.lengths[position]
+        for term in self.term_frequencies(self.articles[position]):
+            self.doc_freq[term] -= 1
+            if not self.doc_freq[term]:
+                del self.doc_freq[term]
+
+    def remove(self, article_id: str):
+        self._tombstone(article_id)
+        self.compact()
+
+    def compact(self):
+        """Drop tombstoned positions from the postings once they outnumber live articles"""
+        dead = len(self.articles) - len(self)
+        if dead <= max(len(self), 64):
+            return
+        alive = np.frombuffer(self.alive, dtype=np.int8).astype(bool)
+        live = np.flatnonzero(alive)
+        remap = np.full(len(self.articles), -1, dtype=np.int32)
+        remap[live] = np.arange(len(live), dtype=np.int32)
+        postings = {}
+        for term, (positions, weights) in self.postings.items():
+            positions = np.frombuffer(positions, dtype=np.int32)
+            keep = alive[positions]
+            if keep.any():
+                postings[term] = (array("i", remap[positions[keep]].tobytes()), array("f", np.frombuffer(weights, dtype=np.float32)[keep].tobytes()))
+        self.postings = postings
+        self.articles = [self.articles[position] for position in live]
+        self.positions = {article["id"]: position for position, article in enumerate(self.articles)}
+        self.lengths = array("f", np.frombuffer(self.lengths, dtype=np.float32)[live].tobytes())
+        self.alive = array("b", bytes([1]) * len(live))
+        if self.vectors is not None:
+            self.vectors = self.vectors[live]
+
+    def _add_vector(self, position: int, vector: np.ndarray):
+        if self.vectors is None:
+            self.vectors = np.zeros((max(position + 1, 1024), vector.shape[0]), dtype=np.float32)
+        elif position >= self.vectors.shape[0]:
+            grown = np.zeros((max(position + 1, self.vectors.shape[0] * 2), self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.vectors.shape[0]] = self.vectors
+            self.vectors = grown
+        self.vectors[position] = vector
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embedder.encode(texts, batch_size=64, normalize_embeddings=True), dtype=np.float32)
+
+    def _top(self, scores: np.ndarray, limit: int) -> List[tuple]:
+        scores[np.frombuffer(self.alive, dtype=np.int8) == 0] = -np.inf
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(position), float(scores[position])) for position in ranked]
+
+    def search_bm25(self, query: str, limit: int) -> List[tuple]:
+        count = len(self)
+        if not count:
+            return []
+        avg_length = self.total_length / count
+        lengths = np.frombuffer(self.lengths, dtype=np.float32)
+        scores = np.zeros(len(self.articles), dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            positions = np.array(self.postings[term][0], dtype=np.int32)
+            frequencies = np.array(self.postings[term][1], dtype=np.float32)
+            live = self.doc_freq[term]
+            idf = math.log(1 + (count - live + 0.5) / (live + 0.5))
+            norm = self.K1 * (1 - self.B + self.B * lengths[positions] / avg_length)
+            np.add.at(scores, positions, idf * frequencies * (self.K1 + 1) / (frequencies + norm))
+        return self._top(scores, limit)
+
+    def search_vector(self, query_vector: np.ndarray, limit: int) -> List[tuple]:
+        if self.vectors is None:
+            return []
+        scores = self.vectors[:len(self.articles)] @ query_vector
+        return self._top(scores, limit)
+
+    def search(self, query: str, limit: int, query_vector: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        started = time.monotonic()
+        if query_vector is None:
+            ranked = self.search_bm25(query, limit)
+        else:
+            # Reciprocal-rank fusion of lexical and semantic rankings
+            fused: Dict[int, float] = {}
+            for results in (self.search_bm25(query, limit * 2), self.search_vector(query_vector, limit * 2)):
+                for rank, (position, _) in enumerate(results):
+                    fused[position] = fused.get(position, 0.0) + 1.0 / (60 + rank)
+            ranked = heapq.nlargest(limit, fused.items(), key=lambda item: item[1])
+        self.searches += 1
+        self.search_time += time.monotonic() - started
+        return [self.articles[position] for position, _ in ranked]
+
+    async def refresh(self):
+        """Sync with the collection: index new and edited articles, drop deleted ones"""
+        stored = set()
+        batch = []
+        async for doc in db.knowledge_articles.find({}, {"_id": 0}).batch_size(1000):
+            stored.add(doc["id"])
+            batch.append(doc)
+            if len(batch) >= 1000:
+                await self.add_many(batch)
+                batch = []
+        if batch:
+            await self.add_many(batch)
+        for article_id in set(self.positions) - stored:
+            self.remove(article_id)
+        self.refreshes += 1
+
+    async def apply_change(self, change: Dict[str, Any]):
+        if change["operationType"] in ("insert", "update", "replace"):
+            doc = change["fullDocument"]
+            doc.pop("_id", None)
+            await self.add_many([doc])
+        else:
+            await self.refresh()
+
+    async def watch(self):
+        await watch_collection("knowledge_articles", self.apply_change, self.refresh, lambda: KB_POLL_INTERVAL, "Knowledge base")
+
+    async def add_many(self, articles: List[Dict[str, Any]]):
+        # Skip articles already indexed as-is, so change events and polls for our own writes cost nothing
+        articles = [article for article in articles if not self.unchanged(article)]
+        if not articles:
+            return
+        vectors = [None] * len(articles)
+        if self.embedder:
+            texts = [f"{article['title']}. {' '.join(article.get('tags', []))}. {article['content']}" for article in articles]
+            vectors = await asyncio.to_thread(self.embed, texts)
+        for article, vector in zip(articles, vectors):
+            self.add(article, vector)
+        self.compact()
+
+    def unchanged(self, article: Dict[str, Any]) -> bool:
+        # created_at comes back from Mongo naive and truncated to milliseconds, so it never compares equal
+        position = self.positions.get(article["id"])
+        if position is None:
+            return False
+        indexed = self.articles[position]
+        return all(indexed.get(field) == value for field, value in article.items() if field != "created_at")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "articles": len(self),
+            "terms": len(self.postings),
+            "vector_search": self.embedder is not None,
+            "searches": self.searches,
+            "refreshes": self.refreshes,
+            "avg_search_ms": self.search_time / self.searches * 1000 if self.searches else 0.0
+        }
+
+def load_embedder():
+    if not KB_EMBEDDING_MODEL:
+        return None
+    if SentenceTransformer is None:
+        logger.error("KB_EMBEDDING_MODEL is set but sentence-transformers is not installed; using BM25 only")
+        return None
+    return SentenceTransformer(KB_EMBEDDING_MODEL)
+
+kb_index = KnowledgeSearchIndex(load_embedder())
+
 # ==================== COMMUNITY ROUTES ====================
 
-@api_router.post("/community/insights", response_model=List[CommunityInsight])
-async def generate_insights(request: GenerateInsightsRequest, current_user: User = Depends(get_current_user)):
-    """Generate community insights"""
-    insights = [
+# Precomputed insights live as long as the timeframe they summarise
+INSIGHT_TTLS = {"day": timedelta(days=1), "week": timedelta(weeks=1), "month": timedelta(days=30)}
+INSIGHTS_DRAFT_ADAPTER = TypeAdapter(InsightsDraft)
+
+def default_insights(request: GenerateInsightsRequest) -> List[CommunityInsight]:
+    return [
         CommunityInsight(
             title="AI-Powered Customer Service Adoption Surges",
             description="Businesses in tech sector seeing 40% efficiency gains with AI chatbots",
@@ -673,59 +3100,459 @@ async def generate_insights(request: GenerateInsightsRequest, current_user: User
             engagement={"views": 890, "likes": 67, "shares": 23}
         )
     ]
-    return insights
+
+class InsightsService:
+    """Serves (industry, topic, timeframe) insights from a TTL store with single-flight regeneration,
+    background precompute of popular keys and batched engagement counters"""
+
+    def __init__(self):
+        self.popularity: Counter = Counter()
+        # Least recently requested first; bounded by INSIGHTS_TRACKED_KEYS since keys come from user input
+        self.requests: "OrderedDict[str, GenerateInsightsRequest]" = OrderedDict()
+        self.pending_views: Counter = Counter()
+        self.flight = SingleFlight()
+        self._tasks: List[asyncio.Task] = []
+        self.store_hits = 0
+        self.generated = 0
+        self.fallbacks = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    @staticmethod
+    def key(request: GenerateInsightsRequest) -> str:
+        return "|".join(part.strip().lower() for part in (request.industry, request.topic, request.timeframe))
+
+    async def generate(self, key: str, request: GenerateInsightsRequest) -> List[CommunityInsight]:
+        prompt = f"""Produce 3-5 community insights for businesses.
+Industry: {request.industry}
+Topic: {request.topic}
+Timeframe: the past {request.timeframe}
+
+Each insight needs a title, a one-sentence description, a type (trend, best_practice, warning or opportunity),
+a category, a relevance_score from 0 to 100 and a source."""
+        draft = await call_ai_structured(prompt, "You are a business community analyst.", INSIGHTS_DRAFT_ADAPTER, "insights")
+        if draft and draft.insights:
+            insights = [
+                CommunityInsight(**insight.model_dump(), engagement={"views": 0, "likes": 0, "shares": 0})
+                for insight in draft.insights
+            ]
+            ttl = INSIGHT_TTLS.get(request.timeframe.strip().lower(), INSIGHT_TTLS["day"])
+            self.generated += 1
+        else:
+            # Keep a transient LLM or parse failure from pinning the defaults for the whole timeframe
+            insights = default_insights(request)
+            ttl = timedelta(seconds=INSIGHTS_FALLBACK_TTL)
+            self.fallbacks += 1
+        
+        now = datetime.now(timezone.utc)
+        await db.community_insights.replace_one(
+            {"_id": key},
+            {
+                "insights": [insight.model_dump() for insight in insights],
+                "generated_at": now,
+                "expires_at": now + ttl
+            },
+            upsert=True
+        )
+        return insights
+
+    async def regenerate(self, key: str, request: GenerateInsightsRequest) -> List[CommunityInsight]:
+        """At most one generation per key is in flight; concurrent callers share its result"""
+        return await self.flight.run(key, lambda: self.generate(key, request))
+
+    def track(self, key: str, request: GenerateInsightsRequest):
+        self.popularity[key] += 1
+        self.requests[key] = request
+        self.requests.move_to_end(key)
+        while len(self.requests) > INSIGHTS_TRACKED_KEYS:
+            evicted, _ = self.requests.popitem(last=False)
+            self.popularity.pop(evicted, None)
+
+    async def get(self, request: GenerateInsightsRequest) -> List[CommunityInsight]:
+        key = self.key(request)
+        self.track(key, request)
+        
+        doc = await db.community_insights.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        if doc:
+            self.store_hits += 1
+            insights = [CommunityInsight(**insight) for insight in doc["insights"]]
+        else:
+            insights = await self.regenerate(key, request)
+        
+        for insight in insights:
+            self.pending_views[(key, insight.id)] += 1
+        return insights
+
+    async def flush_views(self):
+        """Apply accumulated view counts in one bulk write"""
+        if not self.pending_views:
+            return
+        views, self.pending_views = self.pending_views, Counter()
+        try:
+            await db.community_insights.bulk_write([
+                UpdateOne({"_id": key, "insights.id": insight_id}, {"$inc": {"insights.$.engagement.views": count}})
+                for (key, insight_id), count in views.items()
+            ], ordered=False)
+        except Exception:
+            # Nothing is lost: the counts ride along with the next flush
+            self.pending_views.update(views)
+            self.flush_errors += 1
+            raise
+        self.flushes += 1
+
+    async def precompute(self):
+        """Regenerate popular keys whose stored insights are missing or about to expire"""
+        horizon = datetime.now(timezone.utc) + timedelta(seconds=INSIGHTS_PRECOMPUTE_INTERVAL)
+        for key, _ in self.popularity.most_common(INSIGHTS_PRECOMPUTE_TOP):
+            fresh = await db.community_insights.find_one({"_id": key, "expires_at": {"$gt": horizon}}, {"_id": 1})
+            if not fresh and key in self.requests:
+                await self.regenerate(key, self.requests[key])
+        # Halve the counts each round so popularity tracks recent demand
+        for key in list(self.popularity):
+            self.popularity[key] //= 2
+            if not self.popularity[key]:
+                del self.popularity[key]
+                self.requests.pop(key, None)
+
+    async def _every(self, interval: float, work):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await work()
+            except Exception as e:
+                logger.error(f"Insights background error: {str(e)}")
+
+    async def start(self):
+        self._tasks = [
+            asyncio.create_task(self._every(INSIGHTS_FLUSH_INTERVAL, self.flush_views)),
+            asyncio.create_task(self._every(INSIGHTS_PRECOMPUTE_INTERVAL, self.precompute))
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush_views()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_keys": len(self.popularity),
+            "store_hits": self.store_hits,
+            "generated": self.generated,
+            "fallbacks": self.fallbacks,
+            "coalesced": self.flight.coalesced,
+            "pending_view_updates": len(self.pending_views),
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors
+        }
+
+insights_service = InsightsService()
+
+@api_router.post("/community/insights", response_model=List[CommunityInsight])
+async def generate_insights(request: GenerateInsightsRequest, current_user: User = Depends(get_current_user)):
+    """Generate community insights"""
+    return await insights_service.get(request)
 
 @api_router.get("/community/kb/search", response_model=List[KnowledgeArticle])
-async def search_knowledge_base(query: str, limit: int = 10, current_user: User = Depends(get_current_user)):
+async def search_knowledge_base(query: str, limit: int = Query(10, ge=1, le=100), semantic: bool = False,
+                                current_user: User = Depends(get_current_user)):
     """Search knowledge base"""
-    articles = [
-        KnowledgeArticle(
-            title="Getting Started with Business Analytics",
-            content="Comprehensive guide to implementing analytics in your business...",
-            category="analytics",
-            tags=["analytics", "data", "beginner"],
-            author="Data Team",
-            read_time=8
-        )
-    ]
-    return articles
+    query_vector = None
+    if semantic and kb_index.embedder:
+        query_vector = (await asyncio.to_thread(kb_index.embed, [query]))[0]
+    return kb_index.search(query, limit, query_vector)
+
+@api_router.post("/community/kb/articles", response_model=KnowledgeArticle)
+async def add_knowledge_article(request: AddKnowledgeArticleRequest, current_user: User = Depends(get_current_user)):
+    """Add a knowledge base article and index it"""
+    article = KnowledgeArticle(**request.model_dump())
+    await db.knowledge_articles.insert_one(article.model_dump())
+    await kb_index.add_many([article.model_dump()])
+    return article
+
+# Served until experts are added to the experts collection
+DEFAULT_EXPERTS = [
+    {
+        "id": "default-jane-smith",
+        "name": "Dr. Jane Smith",
+        "title": "Business Strategy Consultant",
+        "specialization": ["Strategy", "Growth", "Analytics"],
+        "expertise_level": 95.0,
+        "rating": 4.8,
+        "bio": "20+ years experience in business strategy and transformation"
+    }
+]
+
+class ExpertIndex(WatchedIndex):
+    """Specialization tag -> expert index with exact, prefix and fuzzy topic lookup"""
+
+    def __init__(self):
+        self.experts: Dict[str, Dict[str, Any]] = {}
+        self.tags: Dict[str, set] = {}
+        self.sorted_tags: List[str] = []
+        self._ranked: Optional[List[Dict[str, Any]]] = None
+        self.refreshes = 0
+
+    @staticmethod
+    def rank_key(expert: Dict[str, Any]) -> float:
+        return -(0.6 * expert["expertise_level"] / 100.0 + 0.4 * expert["rating"] / 5.0)
+
+    def rebuild(self, experts: List[Dict[str, Any]]):
+        self.experts = {expert["id"]: expert for expert in experts}
+        self.tags = {}
+        for expert in experts:
+            for tag in expert["specialization"]:
+                self.tags.setdefault(tag.strip().lower(), set()).add(expert["id"])
+        self.sorted_tags = sorted(self.tags)
+        self._ranked = None
+        self.refreshes += 1
+
+    def upsert(self, expert: Dict[str, Any]):
+        self.remove(expert["id"])
+        self.experts[expert["id"]] = expert
+        for tag in expert["specialization"]:
+            tag = tag.strip().lower()
+            if tag not in self.tags:
+                bisect.insort(self.sorted_tags, tag)
+            self.tags.setdefault(tag, set()).add(expert["id"])
+        self._ranked = None
+
+    def remove(self, expert_id: str):
+        expert = self.experts.pop(expert_id, None)
+        if not expert:
+            return
+        for tag in expert["specialization"]:
+            tag = tag.strip().lower()
+            self.tags.get(tag, set()).discard(expert_id)
+            if tag in self.tags and not self.tags[tag]:
+                del self.tags[tag]
+                self.sorted_tags.pop(bisect.bisect_left(self.sorted_tags, tag))
+        self._ranked = None
+
+    def matching_tags(self, topic: str) -> List[str]:
+        topic = topic.strip().lower()
+        if topic in self.tags:
+            return [topic]
+        start = bisect.bisect_left(self.sorted_tags, topic)
+        prefixed = []
+        for tag in self.sorted_tags[start:]:
+            if not tag.startswith(topic):
+                break
+            prefixed.append(tag)
+        return prefixed or difflib.get_close_matches(topic, self.sorted_tags, n=3, cutoff=0.75)
+
+    def search(self, topic: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        if not topic:
+            if self._ranked is None:
+                self._ranked = sorted(self.experts.values(), key=self.rank_key)
+            return self._ranked[:limit]
+        ids = set()
+        for tag in self.matching_tags(topic):
+            ids |= self.tags[tag]
+        return heapq.nsmallest(limit, (self.experts[expert_id] for expert_id in ids), key=self.rank_key)
+
+    async def refresh(self):
+        experts = await db.experts.find({}, {"_id": 0}).to_list(None)
+        self.rebuild(experts or DEFAULT_EXPERTS)
+
+    async def apply_change(self, change: Dict[str, Any]):
+        if change["operationType"] in ("insert", "update", "replace"):
+            doc = change["fullDocument"]
+            doc.pop("_id", None)
+            if any(expert_id.startswith("default-") for expert_id in self.experts):
+                await self.refresh()
+            else:
+                self.upsert(doc)
+        else:
+            await self.refresh()
+
+    async def watch(self):
+        await watch_collection("experts", self.apply_change, self.refresh, lambda: EXPERTS_POLL_INTERVAL, "Expert")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"experts": len(self.experts), "tags": len(self.tags), "refreshes": self.refreshes}
+
+expert_index = ExpertIndex()
 
 @api_router.get("/community/experts", response_model=List[Expert])
-async def get_experts(topic: Optional[str] = None, current_user: User = Depends(get_current_user)):
+async def get_experts(topic: Optional[str] = None, limit: int = Query(20, ge=1, le=100),
+                      current_user: User = Depends(get_current_user)):
     """Get community experts"""
-    experts = [
-        Expert(
-            name="Dr. Jane Smith",
-            title="Business Strategy Consultant",
-            specialization=["Strategy", "Growth", "Analytics"],
-            expertise_level=95.0,
-            rating=4.8,
-            bio="20+ years experience in business strategy and transformation"
-        )
-    ]
-    return experts
+    return expert_index.search(topic, limit)
+
+@api_router.post("/community/experts", response_model=Expert)
+async def add_expert(request: AddExpertRequest, current_user: User = Depends(get_current_user)):
+    """Add a community expert"""
+    expert = Expert(**request.model_dump())
+    await db.experts.insert_one(expert.model_dump())
+    if any(expert_id.startswith("default-") for expert_id in expert_index.experts):
+        await expert_index.refresh()
+    else:
+        expert_index.upsert(expert.model_dump())
+    return expert
+
+# ==================== EXPORT ROUTES ====================
+
+# Exportable collections and the timestamp each one is ordered and resumed by
+EXPORT_COLLECTIONS = {
+    "emotion_analysis": "timestamp",
+    "personas": "created_at",
+    "compliance_reports": "timestamp",
+    "business_dna": "created_at"
+}
+
+async def ndjson_stream(cursor):
+    """Encode documents as NDJSON, yielding roughly EXPORT_CHUNK_BYTES at a time"""
+    buffer = []
+    size = 0
+    async for doc in cursor:
+        line = json.dumps(doc, default=json_default) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+async def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+@api_router.get("/export/{collection}")
+async def export_collection(collection: str, since: Optional[datetime] = None, after_id: Optional[str] = None,
+                            gzip: bool = False, current_user: User = Depends(get_current_user)):
+    """Stream the current user's records as NDJSON, oldest first; resume with since (and after_id) from the last line"""
+    if collection not in EXPORT_COLLECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown export collection: {collection}")
+    
+    field = EXPORT_COLLECTIONS[collection]
+    query: Dict[str, Any] = {"user_id": current_user.id}
+    if since and after_id:
+        query["$or"] = [{field: {"$gt": since}}, {field: since, "id": {"$gt": after_id}}]
+    elif since:
+        query[field] = {"$gt": since}
+    
+    cursor = history_collection(collection).find(query, public_projection(collection)).sort([(field, 1), ("id", 1)]).batch_size(EXPORT_BATCH_SIZE)
+    stream = ndjson_stream(cursor)
+    filename = f"{collection}.ndjson"
+    media_type = "application/x-ndjson"
+    if gzip:
+        stream = gzip_stream(stream)
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 # ==================== DASHBOARD ROUTES ====================
 
+# Collections behind each materialized dashboard counter
+DASHBOARD_COUNTERS = {
+    "emotion_analyses": "emotion_analysis",
+    "personas": "personas",
+    "compliance_reports": "compliance_reports",
+    "dna_profiles": "business_dna"
+}
+
+async def record_activity(user_id: str, counter: str, activity_type: str, message: str, count: int = 1):
+    """Fold a write into the user's materialized dashboard document"""
+    await db.dashboard_stats.update_one(
+        {"_id": user_id},
+        {
+            "$inc": {f"counters.{counter}": count, "version": 1},
+            "$set": {"updated_at": datetime.now(timezone.utc)},
+            "$push": {"activities": {
+                "$each": [{"type": activity_type, "message": message, "timestamp": datetime.now(timezone.utc)}],
+                "$position": 0,
+                "$slice": DASHBOARD_ACTIVITY_LIMIT
+            }}
+        },
+        upsert=True
+    )
+
+async def refresh_dashboard_stats(user_id: str) -> Dict[str, Any]:
+    """Rebuild a user's dashboard counters from the source collections"""
+    # Counted writes may still sit in the buffer; flush them so the rebuild sees them
+    await write_buffer.drain(list(DASHBOARD_COUNTERS.values()))
+    counts = await asyncio.gather(*[
+        db[collection].count_documents({"user_id": user_id}) for collection in DASHBOARD_COUNTERS.values()
+    ])
+    await db.dashboard_stats.update_one(
+        {"_id": user_id},
+        {
+            "$set": {"counters": dict(zip(DASHBOARD_COUNTERS, counts)), "initialized": True, "updated_at": datetime.now(timezone.utc)},
+            "$inc": {"version": 1},
+            "$setOnInsert": {"activities": []}
+        },
+        upsert=True
+    )
+    return await db.dashboard_stats.find_one({"_id": user_id})
+
+dashboard_rebuilds = SingleFlight()
+
+async def load_dashboard(user_id: str) -> Dict[str, Any]:
+    doc = await db.dashboard_stats.find_one({"_id": user_id})
+    # record_activity's upsert can create the document before any rebuild, starting every counter at zero;
+    # concurrent first reads share one rebuild
+    if not doc or not doc.get("initialized"):
+        return await dashboard_rebuilds.run(user_id, lambda: refresh_dashboard_stats(user_id))
+    return doc
+
+async def decrement_counter(user_id: str, counter: str, count: int = 1):
+    """Undo a counted write; uninitialized documents are left for the next rebuild to count"""
+    await db.dashboard_stats.update_one(
+        {"_id": user_id, "initialized": True},
+        {"$inc": {f"counters.{counter}": -count, "version": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+
+def humanize_age(timestamp: datetime) -> str:
+    seconds = (datetime.now(timezone.utc) - as_utc(timestamp)).total_seconds()
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            value = int(seconds // size)
+            return f"{value} {unit}{'s' if value > 1 else ''} ago"
+    return "just now"
+
+def etag_response(payload: Any, if_none_match: Optional[str]) -> Response:
+    """Serve payload with a content ETag, or 304 when the client already has it"""
+    body = dumps_json(payload)
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @api_router.get("/dashboard/stats")
-async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
+async def get_dashboard_stats(if_none_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user)):
     """Get dashboard statistics"""
-    return {
+    dashboard = await load_dashboard(current_user.id)
+    counters = {name: dashboard.get("counters", {}).get(name, 0) for name in DASHBOARD_COUNTERS}
+    return etag_response({
         "monthly_revenue": 145000,
         "revenue_target": 200000,
         "active_customers": 324,
         "growth_rate": 23.5,
-        "ai_efficiency": 87.0
-    }
+        "ai_efficiency": 87.0,
+        **counters
+    }, if_none_match)
 
 @api_router.get("/dashboard/activities")
-async def get_recent_activities(current_user: User = Depends(get_current_user)):
+async def get_recent_activities(if_none_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user)):
     """Get recent activities"""
-    return [
-        {"type": "customer", "message": "New customer: Acme Corp", "time": "2 hours ago"},
-        {"type": "payment", "message": "Payment received: $5,000", "time": "5 hours ago"},
-        {"type": "analysis", "message": "AI analysis completed", "time": "1 day ago"}
-    ]
+    dashboard = await load_dashboard(current_user.id)
+    return etag_response([
+        {"type": activity["type"], "message": activity["message"], "time": humanize_age(activity["timestamp"])}
+        for activity in dashboard.get("activities", [])
+    ], if_none_match)
 
 # ==================== EDGE AI ROUTES (MOCKED) ====================
 
@@ -760,6 +3587,342 @@ async def get_edge_models(current_user: User = Depends(get_current_user)):
         }
     ]
 
+# ==================== BACKGROUND JOBS ====================
+
+class MemoryJobStore:
+    """In-process job store for tests and single-node development"""
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    async def insert(self, job: Dict[str, Any]):
+        self.jobs[job["id"]] = dict(job)
+
+    async def update(self, job_id: str, fields: Dict[str, Any], owner: str):
+        job = self.jobs.get(job_id)
+        if job and job.get("owner") == owner:
+            job.update(fields)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def claim(self, owner: str, lease_until: datetime) -> Optional[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        for job in sorted(self.jobs.values(), key=lambda job: job["created_at"]):
+            if job["status"] == "queued" or (job["status"] == "running" and (job.get("lease_until") is None or job["lease_until"] < now)):
+                job.update({"status": "running", "owner": owner, "lease_until": lease_until})
+                return dict(job)
+        return None
+
+    async def release(self, owner: str):
+        for job in self.jobs.values():
+            if job.get("owner") == owner and job["status"] == "running":
+                job.update({"status": "queued", "owner": None, "lease_until": None})
+
+class MongoJobStore:
+    """Job store backed by the jobs collection; claims are atomic so any number of processes can share it"""
+
+    async def insert(self, job: Dict[str, Any]):
+        await db.jobs.insert_one(dict(job))
+
+    async def update(self, job_id: str, fields: Dict[str, Any], owner: str):
+        # Writes from a worker that lost its lease are dropped
+        await db.jobs.update_one({"id": job_id, "owner": owner}, {"$set": fields})
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await db.jobs.find_one({"id": job_id}, {"_id": 0})
+
+    async def claim(self, owner: str, lease_until: datetime) -> Optional[Dict[str, Any]]:
+        """Take the oldest queued job, or a running one whose owner stopped renewing its lease"""
+        job = await db.jobs.find_one_and_update(
+            {"$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_until": {"$lt": datetime.now(timezone.utc)}},
+                {"status": "running", "lease_until": None}
+            ]},
+            {"$set": {"status": "running", "owner": owner, "lease_until": lease_until}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            job.pop("_id", None)
+        return job
+
+    async def release(self, owner: str):
+        await db.jobs.update_many(
+            {"owner": owner, "status": "running"},
+            {"$set": {"status": "queued", "owner": None, "lease_until": None}}
+        )
+
+class JobQueue:
+    """Bounded asyncio worker pool running registered AI jobs with retries.
+
+    Workers claim jobs from the store under a renewable lease, so jobs are shared safely across
+    uvicorn workers and replicas and a crashed process's jobs are retried once its lease expires.
+    """
+
+    def __init__(self, store, workers: int, max_retries: int, retry_delay: float, lease: float, poll_interval: float):
+        self.store = store
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, tuple] = {}
+        self.wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+
+    def register(self, kind: str, request_model, handler):
+        self.handlers[kind] = (request_model, handler)
+
+    def lease_deadline(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease)
+
+    async def start(self):
+        self.wakeup = asyncio.Event()
+        # Unfinished jobs from a previous process are claimed like new ones once their lease has expired
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Hand interrupted jobs straight back instead of waiting out their lease
+        try:
+            await self.store.release(self.owner)
+        except Exception as e:
+            logger.error(f"Job release error: {str(e)}")
+
+    async def submit(self, kind: str, payload: Dict[str, Any], user_id: str) -> Job:
+        if kind not in self.handlers:
+            raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind}")
+        try:
+            self.handlers[kind][0](**payload)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+        
+        job = Job(kind=kind, payload=payload, user_id=user_id)
+        await self.store.insert(job.model_dump())
+        self.wakeup.set()
+        return job
+
+    async def _worker(self):
+        while True:
+            # Cleared before claiming so a submit landing mid-claim still wakes us
+            self.wakeup.clear()
+            try:
+                job = await self.store.claim(self.owner, self.lease_deadline())
+            except Exception as e:
+                logger.error(f"Job claim error: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            self.running += 1
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"Job worker error on {job['id']}: {str(e)}")
+            finally:
+                self.running -= 1
+
+    async def _renew_lease(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            await self.store.update(job_id, {"lease_until": self.lease_deadline()}, self.owner)
+
+    async def _run(self, job: Dict[str, Any]):
+        request_model, handler = self.handlers[job["kind"]]
+        renewer = asyncio.create_task(self._renew_lease(job["id"]))
+        try:
+            await self._attempt(job, request_model, handler)
+        finally:
+            renewer.cancel()
+
+    async def _attempt(self, job: Dict[str, Any], request_model, handler):
+        attempts = job.get("attempts", 0)
+        while True:
+            attempts += 1
+            await self.store.update(job["id"], {
+                "attempts": attempts,
+                "started_at": datetime.now(timezone.utc)
+            }, self.owner)
+            try:
+                result = await handler(request_model(**job["payload"]))
+            except Exception as e:
+                error = e.detail if isinstance(e, HTTPException) else str(e)
+                if attempts <= self.max_retries:
+                    # Stays running under our lease while backing off, so no other worker picks it up
+                    self.retried += 1
+                    await self.store.update(job["id"], {"error": error}, self.owner)
+                    await asyncio.sleep(self.retry_delay * attempts)
+                    continue
+                self.failed += 1
+                await self.store.update(job["id"], {
+                    "status": "failed",
+                    "error": error,
+                    "lease_until": None,
+                    "finished_at": datetime.now(timezone.utc)
+                }, self.owner)
+                return
+            
+            self.succeeded += 1
+            await self.store.update(job["id"], {
+                "status": "succeeded",
+                "result": result.model_dump(mode="json"),
+                "error": None,
+                "lease_until": None,
+                "finished_at": datetime.now(timezone.utc)
+            }, self.owner)
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.store).__name__,
+            "owner": self.owner,
+            "workers": self.workers,
+            "lease_seconds": self.lease,
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried
+        }
+
+job_queue = JobQueue(
+    MemoryJobStore() if JOB_BACKEND == "memory" else MongoJobStore(),
+    JOB_WORKERS,
+    JOB_MAX_RETRIES,
+    JOB_RETRY_DELAY,
+    JOB_LEASE_SECONDS,
+    JOB_POLL_INTERVAL
+)
+job_queue.register("emotion.analyze", EmotionAnalyzeRequest, run_emotion_analysis)
+job_queue.register("persona.generate", GeneratePersonaRequest, run_persona_generation)
+
+@api_router.post("/jobs", response_model=Job, status_code=202)
+async def submit_job(request: JobSubmitRequest, current_user: User = Depends(get_current_user)):
+    """Queue an AI job and return its id immediately"""
+    return await job_queue.submit(request.kind, request.payload, current_user.id)
+
+@api_router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Poll a job's status and result"""
+    job = await job_queue.store.get(job_id)
+    if not job or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# ==================== SYSTEM ROUTES ====================
+
+def runtime_stats() -> Dict[str, Any]:
+    """Collect the stats of every runtime component"""
+    return {
+        "session_cache": {**session_cache.stats(), "revocations": session_revocations.stats()},
+        "llm_pool": llm_pool.stats(),
+        "llm_cache": llm_cache.stats(),
+        "structured_output": structured_output.stats(),
+        "jobs": job_queue.stats(),
+        "knowledge_base": kb_index.stats(),
+        "compliance_engine": compliance_engine.stats(),
+        "experts": expert_index.stats(),
+        "funding": funding_matcher.stats(),
+        "dna_index": dna_index.stats(),
+        "insights": insights_service.stats(),
+        "write_buffer": write_buffer.stats(),
+        "auth_client": session_data_client.stats()
+    }
+
+@api_router.get("/system/stats")
+async def get_system_stats(current_user: User = Depends(get_current_user)):
+    """Get runtime cache and performance counters"""
+    return runtime_stats()
+
+@api_router.get("/system/db")
+async def get_db_telemetry(current_user: User = Depends(get_current_user)):
+    """Get MongoDB connection pool health and per-command latency"""
+    return {
+        "pool": pool_telemetry.stats(),
+        "commands": command_telemetry.stats(),
+        "compressors": MONGO_COMPRESSORS.split(",") if MONGO_COMPRESSORS else [],
+        "history_read_preference": MONGO_HISTORY_READ_PREFERENCE
+    }
+
+@api_router.get("/system/indexes")
+async def get_index_report(current_user: User = Depends(get_current_user)):
+    """Get the index manifest and which route queries each index covers"""
+    return index_report
+
+@api_router.get("/system/slow-requests")
+async def get_slow_requests(limit: int = Query(50, ge=1, le=1000), current_user: User = Depends(get_current_user)):
+    """Get the most recent sampled slow requests with their phase breakdown"""
+    return {
+        "threshold_ms": SLOW_REQUEST_THRESHOLD_MS,
+        "sample_rate": SLOW_REQUEST_SAMPLE_RATE,
+        "requests": list(slow_requests)[-limit:][::-1]
+    }
+
+# ==================== METRICS ====================
+
+METRIC_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+def gauge_lines(prefix: str, value: Any) -> List[str]:
+    """Flatten numeric stats into Prometheus gauges"""
+    if isinstance(value, dict):
+        return [line for key, item in value.items() for line in gauge_lines(f"{prefix}_{key}", item)]
+    if isinstance(value, (int, float)):
+        return [f"{METRIC_NAME.sub('_', prefix)} {float(value)}"]
+    return []
+
+@app.middleware("http")
+async def record_request_metrics(request, call_next):
+    """Record per-route latency and sample slow requests with their phase breakdown"""
+    phases: Dict[str, float] = {}
+    token = request_phases.set(phases)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        request_phases.reset(token)
+        # Label by route template so path parameters don't explode the series count
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        request_histogram.observe((request.method, route_path, str(status)), elapsed)
+        if elapsed * 1000 >= SLOW_REQUEST_THRESHOLD_MS and random.random() < SLOW_REQUEST_SAMPLE_RATE:
+            breakdown = {phase: round(seconds * 1000, 3) for phase, seconds in phases.items()}
+            breakdown["app"] = round(max(elapsed - sum(phases.values()), 0.0) * 1000, 3)
+            slow_requests.append({
+                "method": request.method,
+                "route": route_path,
+                "path": request.url.path,
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 3),
+                "phases_ms": breakdown,
+                "timestamp": datetime.now(timezone.utc).isoformat()
+            })
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of latency histograms and runtime gauges"""
+    lines = request_histogram.expose() + phase_histogram.expose() + db_histogram.expose()
+    lines += gauge_lines("app", runtime_stats())
+    lines += gauge_lines("mongo_pool", pool_telemetry.stats())
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -771,6 +3934,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup_db_client():
+    await ensure_indexes()
+    await job_queue.start()
+    await session_revocations.start()
+    await kb_index.start()
+    await funding_matcher.start()
+    await expert_index.start()
+    await dna_index.start()
+    await insights_service.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await job_queue.stop()
+    await session_revocations.stop()
+    await expert_index.stop()
+    await kb_index.stop()
+    await dna_index.stop()
+    await funding_matcher.stop()
+    await insights_service.stop()
+    await write_buffer.flush_all()
+    await session_data_client.close()
     client.close()
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""Offline benchmark harness: the FastAPI app over mongomock with a fake LLM and auth stub"""
+import os
+import sys
+import json
+import asyncio
+import time
+import uuid
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Any
+from datetime import datetime, timezone, timedelta
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Replies keyed by the schema title call_ai_structured embeds in the prompt
+CANNED_REPLIES = {
+    "EmotionDraft": json.dumps({
+        "emotions": {"joy": 0.6, "sadness": 0.1, "anger": 0.05, "fear": 0.05, "surprise": 0.1, "neutral": 0.1},
+        "dominant_emotion": "joy",
+        "confidence": 0.82
+    }),
+    "PersonaDraft": json.dumps({
+        "name": "Dana Whitfield",
+        "title": "VP Operations",
+        "company": "Northwind Logistics",
+        "pain_points": ["Manual reporting", "Fragmented tooling", "Slow onboarding"],
+        "goals": ["Cut reporting time in half", "Consolidate vendors"],
+        "decision_style": "Data-driven",
+        "stakeholders": [{"name": "Chris Lee", "role": "CFO", "influence_level": 0.9, "concerns": ["ROI"]}],
+        "confidence_score": 0.78
+    })
+}
+
+class FakeLlm:
+    """LlmChat stand-in answering after a fixed delay; doubles as the pool's client factory"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, system_message: str) -> "FakeLlm":
+        return self
+
+    async def send_message(self, message) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        for title, reply in CANNED_REPLIES.items():
+            if f'"title": "{title}"' in message.text:
+                return reply
+        return "Prioritise the two highest-impact actions and review progress weekly."
+
+def auth_stub(latency: float) -> httpx.MockTransport:
+    """Emergent Auth stand-in: session ID signup-<n> belongs to new-user-<n // 2>, so sign-ins race in pairs"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        n = int(request.headers["X-Session-ID"].rsplit("-", 1)[1])
+        user_id = f"new-user-{n // 2}"
+        return httpx.Response(200, json={
+            "id": user_id,
+            "email": f"{user_id}@example.com",
+            "name": f"New User {n // 2}",
+            "picture": "https://example.com/avatar.png",
+            "session_token": f"bench-login-{uuid.uuid4()}"
+        })
+    return httpx.MockTransport(handler)
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str  # formatted with user_id and n (the request number)
+    body: Optional[Callable[[str, int], Dict[str, Any]]] = None
+
+SCENARIOS = [
+    Scenario("auth_me", "GET", "/api/auth/me"),
+    Scenario("auth_first_login", "POST", "/api/auth/session", lambda user_id, n: {
+        "id": "", "email": "", "name": "", "picture": "", "session_token": f"signup-{n}"
+    }),
+    Scenario("emotion_analyze", "POST", "/api/emotion/analyze", lambda user_id, n: {
+        "user_id": user_id,
+        "text": f"Customer call #{n} went better than expected and the team is excited",
+        "context": "sales"
+    }),
+    Scenario("emotion_history", "GET", "/api/emotion/history/{user_id}"),
+    Scenario("persona_generate", "POST", "/api/persona/generate", lambda user_id, n: {
+        "user_id": user_id,
+        "industry": "Logistics",
+        "company_size": "200-500",
+        "budget_range": "$50k-$100k",
+        "context": f"Benchmark request {n}"
+    }),
+    Scenario("persona_list", "GET", "/api/persona/all/{user_id}"),
+    Scenario("compliance_check", "POST", "/api/compliance/check", lambda user_id, n: {
+        "user_id": user_id,
+        "company_name": f"Bench Co {n}",
+        "industry": ["fintech", "healthcare", "retail", "saas"][n % 4],
+        "size": ["10", "60", "300"][n % 3],
+        "location": ["EU", "US", "UK"][n % 3]
+    }),
+    Scenario("dashboard_stats", "GET", "/api/dashboard/stats")
+]
+
+@dataclass
+class BenchSession:
+    client: httpx.AsyncClient
+    llm: FakeLlm
+    users: List[Dict[str, str]] = field(default_factory=list)
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sample"""
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+async def seed(database, users: int, history: int) -> List[Dict[str, str]]:
+    """Create users with live sessions plus emotion and persona history to read back"""
+    now = datetime.now(timezone.utc)
+    seeded = []
+    for i in range(users):
+        user_id = f"bench-user-{i}"
+        token = f"bench-session-{uuid.uuid4()}"
+        await database.users.insert_one({"_id": user_id, "email": f"{user_id}@example.com", "name": f"Bench User {i}", "created_at": now})
+        await database.user_sessions.insert_one({"user_id": user_id, "session_token": token, "expires_at": now + timedelta(days=7), "created_at": now})
+        emotions = json.loads(CANNED_REPLIES["EmotionDraft"])
+        persona = json.loads(CANNED_REPLIES["PersonaDraft"])
+        await database.emotion_analysis.insert_many([
+            server.EmotionAnalysis(user_id=user_id, text=f"Seeded note {n}", timestamp=now - timedelta(minutes=n), **emotions).model_dump()
+            for n in range(history)
+        ])
+        await database.personas.insert_many([
+            server.ClientPersona(user_id=user_id, industry="Logistics", company_size="200-500", budget_range="$50k-$100k",
+                                 created_at=now - timedelta(minutes=n), **persona).model_dump()
+            for n in range(history)
+        ])
+        seeded.append({"user_id": user_id, "token": token})
+    return seeded
+
+async def start(users: int = 20, history: int = 50, llm_latency: float = 0.02, auth_latency: float = 0.01) -> BenchSession:
+    """Point the app at a fresh in-memory database, fake LLM and auth stub, run startup hooks and seed data"""
+    server.db = server.InstrumentedDatabase(AsyncMongoMockClient()[os.environ["DB_NAME"]])
+    llm = FakeLlm(llm_latency)
+    server.llm_pool.factory = llm
+    await server.session_data_client.close()
+    server.session_data_client.transport = auth_stub(auth_latency)
+    for handler in server.app.router.on_startup:
+        await handler()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench")
+    return BenchSession(client=client, llm=llm, users=await seed(server.db, users, history))
+
+async def stop(session: BenchSession):
+    await session.client.aclose()
+    for handler in server.app.router.on_shutdown:
+        await handler()
+
+async def run_scenario(session: BenchSession, scenario: Scenario, requests: int = 200, concurrency: int = 16) -> Dict[str, Any]:
+    """Fire requests at one route from concurrent workers; report throughput and latency percentiles"""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for n in counter:
+            user = session.users[n % len(session.users)]
+            path = scenario.path.format(user_id=user["user_id"], n=n)
+            body = scenario.body(user["user_id"], n) if scenario.body else None
+            started = time.perf_counter()
+            response = await session.client.request(
+                scenario.method, path, json=body, headers={"Cookie": f"session_token={user['token']}"}
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3)
+    }
+
+async def run_all(names: Optional[List[str]] = None, requests: int = 200, concurrency: int = 16,
+                  llm_latency: float = 0.02, auth_latency: float = 0.01, users: int = 20, history: int = 50) -> Dict[str, Any]:
+    """Run the selected scenarios in order against one seeded app instance"""
+    session = await start(users=users, history=history, llm_latency=llm_latency, auth_latency=auth_latency)
+    try:
+        results = {}
+        for scenario in SCENARIOS:
+            if names and scenario.name not in names:
+                continue
+            results[scenario.name] = await run_scenario(session, scenario, requests=requests, concurrency=concurrency)
+        return {
+            "config": {"requests": requests, "concurrency": concurrency, "llm_latency": llm_latency,
+                       "auth_latency": auth_latency, "users": users, "history": history},
+            "scenarios": results
+        }
+    finally:
+        await stop(session)
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.3) -> List[str]:
+    """List regressions: p99 above or throughput below the baseline by more than the tolerance"""
+    regressions = []
+    for name, base in baseline["scenarios"].items():
+        result = current["scenarios"].get(name)
+        if result is None:
+            continue
+        if result["errors"]:
+            regressions.append(f"{name}: errors {result['errors']}")
+        if result["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {result['p99_ms']}ms vs baseline {base['p99_ms']}ms")
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput_rps']}rps vs baseline {base['throughput_rps']}rps")
+    return regressions
@@ -0,0 +1,52 @@
+"""Run the route benchmarks; save a JSON baseline or fail on regressions against one
+
+    python -m tests.bench.run --save tests/bench/baseline.json
+    python -m tests.bench.run --compare tests/bench/baseline.json --tolerance 0.3
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from tests.bench.harness import SCENARIOS, run_all, compare
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=[scenario.name for scenario in SCENARIOS],
+                        help="Run only these scenarios (repeatable)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="Fake LLM response time in seconds")
+    parser.add_argument("--auth-latency", type=float, default=0.01, help="Auth stub response time in seconds")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--history", type=int, default=50, help="Seeded emotion/persona documents per user")
+    parser.add_argument("--save", type=Path, help="Write results to this baseline file")
+    parser.add_argument("--compare", type=Path, help="Compare results against this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative p99/throughput drift")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_all(
+        names=args.scenario, requests=args.requests, concurrency=args.concurrency,
+        llm_latency=args.llm_latency, auth_latency=args.auth_latency, users=args.users, history=args.history
+    ))
+
+    print(f"{'scenario':<20}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, result in results["scenarios"].items():
+        print(f"{name:<20}{result['throughput_rps']:>10}{result['p50_ms']:>10}{result['p99_ms']:>10}{sum(result['errors'].values()):>8}")
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
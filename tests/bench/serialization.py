@@ -0,0 +1,94 @@
+"""Per-document response serialization cost: FastAPI's default path vs FAST_SERIALIZATION
+
+    python -m tests.bench.serialization --docs 100 --rounds 50
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from tests.bench.harness import CANNED_REPLIES, server
+
+def emotion_docs(count: int) -> List[Dict[str, Any]]:
+    """Documents shaped like Mongo returns them: naive datetimes, _id projected away"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    emotions = json.loads(CANNED_REPLIES["EmotionDraft"])
+    return [
+        server.EmotionAnalysis(user_id="bench-user", text=f"Seeded note {n}", timestamp=now - timedelta(minutes=n), **emotions).model_dump()
+        for n in range(count)
+    ]
+
+def persona_docs(count: int) -> List[Dict[str, Any]]:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    persona = json.loads(CANNED_REPLIES["PersonaDraft"])
+    return [
+        server.ClientPersona(user_id="bench-user", industry="Logistics", company_size="200-500", budget_range="$50k-$100k",
+                             created_at=now - timedelta(minutes=n), **persona).model_dump()
+        for n in range(count)
+    ]
+
+async def default_body(model, docs: List[Dict[str, Any]]) -> bytes:
+    """What a response_model=List[model] route does today: validate, encode to jsonable, json.dumps"""
+    field = create_response_field(name=f"Response_{model.__name__}", type_=List[model])
+    return JSONResponse(await serialize_response(field=field, response_content=docs)).body
+
+def fast_body(model, docs: List[Dict[str, Any]]) -> bytes:
+    enabled = server.FAST_SERIALIZATION
+    server.FAST_SERIALIZATION = True
+    try:
+        return server.list_response(model, docs).body
+    finally:
+        server.FAST_SERIALIZATION = enabled
+
+async def timed(fn, rounds: int) -> float:
+    """Best-of-rounds wall time of one call, in seconds"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+        best = min(best, time.perf_counter() - started)
+    return best
+
+async def run(docs: int = 100, rounds: int = 50) -> Dict[str, Any]:
+    results = {}
+    for name, model, payload in (
+        ("emotion_history", server.EmotionAnalysis, emotion_docs(docs)),
+        ("persona_list", server.ClientPersona, persona_docs(docs))
+    ):
+        before = await timed(lambda: default_body(model, payload), rounds)
+        after = await timed(lambda: fast_body(model, payload), rounds)
+        results[name] = {
+            "docs": docs,
+            "default_us_per_doc": round(before / docs * 1e6, 3),
+            "fast_us_per_doc": round(after / docs * 1e6, 3),
+            "speedup": round(before / after, 2)
+        }
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--save", type=Path, help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.docs, args.rounds))
+    print(f"{'route':<20}{'default us/doc':>16}{'fast us/doc':>14}{'speedup':>10}")
+    for name, result in results.items():
+        print(f"{name:<20}{result['default_us_per_doc']:>16}{result['fast_us_per_doc']:>14}{result['speedup']:>9}x")
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
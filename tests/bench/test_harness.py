@@ -0,0 +1,21 @@
+import asyncio
+import pytest
+
+pytest.importorskip("emergentintegrations")
+pytest.importorskip("mongomock_motor")
+
+from tests.bench.harness import SCENARIOS, run_all, compare
+
+def test_every_scenario_runs_cleanly():
+    results = asyncio.run(run_all(requests=8, concurrency=4, llm_latency=0, users=2, history=5))
+    assert set(results["scenarios"]) == {scenario.name for scenario in SCENARIOS}
+    for name, result in results["scenarios"].items():
+        assert result["errors"] == {}, name
+        assert result["p50_ms"] <= result["p99_ms"]
+
+def test_compare_flags_regressions():
+    baseline = {"scenarios": {"auth_me": {"p99_ms": 10.0, "throughput_rps": 100.0, "errors": {}}}}
+    steady = {"scenarios": {"auth_me": {"p99_ms": 12.0, "throughput_rps": 90.0, "errors": {}}}}
+    slower = {"scenarios": {"auth_me": {"p99_ms": 20.0, "throughput_rps": 50.0, "errors": {}}}}
+    assert compare(steady, baseline, tolerance=0.3) == []
+    assert len(compare(slower, baseline, tolerance=0.3)) == 2
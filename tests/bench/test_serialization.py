@@ -0,0 +1,25 @@
+import asyncio
+import json
+import pytest
+
+pytest.importorskip("emergentintegrations")
+pytest.importorskip("mongomock_motor")
+
+from tests.bench.harness import server
+from tests.bench.serialization import emotion_docs, persona_docs, default_body, fast_body, run
+
+@pytest.mark.parametrize("model, make_docs", [(server.EmotionAnalysis, emotion_docs), (server.ClientPersona, persona_docs)])
+def test_fast_path_matches_default_output(model, make_docs):
+    docs = make_docs(5)
+    assert json.loads(fast_body(model, docs)) == json.loads(asyncio.run(default_body(model, docs)))
+
+def test_partial_page_keeps_only_projected_fields():
+    adapter = server.page_adapter(server.EmotionAnalysis, frozenset({"id", "timestamp", "dominant_emotion"}))
+    doc = emotion_docs(1)[0]
+    page = adapter.validate_python({"items": [{name: doc[name] for name in ("id", "timestamp", "dominant_emotion")}], "next_cursor": None})
+    assert set(json.loads(adapter.dump_json(page))["items"][0]) == {"id", "timestamp", "dominant_emotion"}
+
+def test_benchmark_reports_per_document_cost():
+    results = asyncio.run(run(docs=10, rounds=2))
+    assert set(results) == {"emotion_history", "persona_list"}
+    assert all(result["fast_us_per_doc"] > 0 for result in results.values())
@@ -0,0 +1,47 @@
+"""Shared fixtures: the app module over an in-memory database, an ASGI client and a fake LLM"""
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test")
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def server():
+    return pytest.importorskip("server")
+
+@pytest.fixture
+def db(server, monkeypatch):
+    """A fresh in-memory database behind server.db"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    database = server.InstrumentedDatabase(mongomock_motor.AsyncMongoMockClient()[os.environ["DB_NAME"]])
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+@pytest.fixture
+def user(server, monkeypatch):
+    """Authenticate every request as u1"""
+    current = server.User(id="u1", email="u1@example.com", name="U1")
+    monkeypatch.setitem(server.app.dependency_overrides, server.get_current_user, lambda: current)
+    return current
+
+@pytest.fixture
+def fake_llm(server, monkeypatch):
+    """Instant canned LLM replies; prompts without a canned reply get free text, so parsing falls back"""
+    from tests.bench.harness import FakeLlm
+    llm = FakeLlm(0)
+    monkeypatch.setattr(server.llm_pool, "factory", llm)
+    return llm
+
+@pytest.fixture
+async def client(server, db, anyio_backend):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+        yield client
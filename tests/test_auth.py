@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import httpx
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+async def test_double_login_then_logout_revokes_the_session(db, client, monkeypatch):
+    async def session_data(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={
+            "id": "user-1", "email": "user-1@example.com", "name": "User One",
+            "picture": "https://example.com/a.png", "session_token": "app-token-1"
+        })
+
+    await server.ensure_indexes()
+    await server.session_data_client.close()
+    monkeypatch.setattr(server.session_data_client, "transport", httpx.MockTransport(session_data))
+    body = {"id": "", "email": "", "name": "", "picture": "", "session_token": "emergent-session-1"}
+    try:
+        logins = await asyncio.gather(client.post("/api/auth/session", json=body), client.post("/api/auth/session", json=body))
+        sessions = await db.user_sessions.count_documents({"session_token": "app-token-1"})
+        cookie = {"Cookie": "session_token=app-token-1"}
+        before = await client.get("/api/auth/me", headers=cookie)
+        await client.post("/api/auth/logout", headers=cookie)
+        after = await client.get("/api/auth/me", headers=cookie)
+    finally:
+        await server.session_data_client.close()
+
+    assert [login.status_code for login in logins] == [200, 200]
+    assert sessions == 1
+    assert (before.status_code, after.status_code) == (200, 401)
+
+async def test_logout_evicts_the_cached_session(db, client, monkeypatch):
+    monkeypatch.setattr(server, "session_cache", server.SessionCache(max_size=10, ttl=60))
+    monkeypatch.setattr(server, "session_revocations", server.SessionRevocations(server.session_cache))
+    await db.users.insert_one({"_id": "u1", "email": "u1@example.com", "name": "U1"})
+    await db.user_sessions.insert_one({"user_id": "u1", "session_token": "t1", "expires_at": datetime.now(timezone.utc) + timedelta(days=1)})
+    cookie = {"Cookie": "session_token=t1"}
+
+    before = await client.get("/api/auth/me", headers=cookie)
+    await client.post("/api/auth/logout", headers=cookie)
+    after = await client.get("/api/auth/me", headers=cookie)
+
+    assert (before.status_code, after.status_code) == (200, 401)
+    assert await db.session_revocations.count_documents({"session_token": "t1"}) == 1
@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+@pytest.mark.parametrize("fast", [False, True])
+async def test_fingerprints_stay_out_of_history_pages_and_exports(db, user, client, monkeypatch, fast):
+    monkeypatch.setattr(server, "FAST_SERIALIZATION", fast)
+    report = server.ComplianceReport(user_id="u1", checks=[], overall_score=90.0)
+    await db.compliance_reports.insert_one({**report.model_dump(), "fingerprints": {"gdpr": "abc123"}})
+
+    history = (await client.get("/api/compliance/history/u1")).json()
+    page = (await client.get("/api/compliance/history/u1/page")).json()["items"]
+    export = [json.loads(line) for line in (await client.get("/api/export/compliance_reports")).text.splitlines()]
+
+    items = history + page + export
+    assert len(items) == 3
+    assert all("fingerprints" not in item and item["overall_score"] == 90.0 for item in items)
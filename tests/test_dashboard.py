@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+async def test_counters_survive_early_upsert_and_persona_delete(db, user, client, fake_llm):
+    from tests.bench.harness import CANNED_REPLIES
+    persona = json.loads(CANNED_REPLIES["PersonaDraft"])
+    await db.personas.insert_many([
+        server.ClientPersona(user_id="u1", industry="Retail", company_size="10-50", budget_range="$10k", **persona).model_dump()
+        for _ in range(6)
+    ])
+    # Any counted write before the first dashboard read creates the document at zero
+    await server.record_activity("u1", "compliance_reports", "compliance", "Compliance check completed")
+
+    before = (await client.get("/api/dashboard/stats")).json()["personas"]
+    created = await client.post("/api/persona/generate", json={
+        "user_id": "u1", "industry": "Retail", "company_size": "10-50", "budget_range": "$10k"
+    })
+    after_create = (await client.get("/api/dashboard/stats")).json()["personas"]
+    await client.delete(f"/api/persona/{created.json()['id']}")
+    after_delete = (await client.get("/api/dashboard/stats")).json()["personas"]
+
+    assert (before, after_create, after_delete) == (6, 7, 6)
+
+async def test_concurrent_first_reads_share_one_rebuild(db, user, monkeypatch):
+    rebuilds = []
+    refresh = server.refresh_dashboard_stats
+
+    async def counting_refresh(user_id):
+        rebuilds.append(user_id)
+        return await refresh(user_id)
+
+    monkeypatch.setattr(server, "refresh_dashboard_stats", counting_refresh)
+    docs = await asyncio.gather(*[server.load_dashboard("u1") for _ in range(10)])
+
+    assert rebuilds == ["u1"]
+    assert all(doc["initialized"] for doc in docs)
+
+async def test_rebuild_counts_buffered_fire_and_forget_writes(db, user):
+    await server.write_buffer.insert("personas", {"id": "p1", "user_id": "u1"}, durability="fire_and_forget")
+
+    doc = await server.load_dashboard("u1")
+
+    assert doc["counters"]["personas"] == 1
@@ -0,0 +1,41 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+class BatchLlm:
+    """Answers every numbered text in a batch prompt after a fixed delay"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def __call__(self, system_message: str) -> "BatchLlm":
+        return self
+
+    async def send_message(self, message) -> str:
+        await asyncio.sleep(self.latency)
+        indexes = [int(index) for index in re.findall(r"^(\d+)\. Text", message.text, re.M)]
+        return json.dumps([
+            {"index": index, "emotions": {"joy": 0.7, "neutral": 0.3}, "dominant_emotion": "joy", "confidence": 0.9}
+            for index in indexes
+        ])
+
+async def test_batch_larger_than_the_llm_pool_completes(db, user, client, monkeypatch):
+    # 2 slots, a queue of 1 and a queue timeout far shorter than one LLM call
+    pool = server.LlmPool(max_concurrency=2, max_queue=1, queue_timeout=0.01, call_timeout=5)
+    pool.factory = BatchLlm(0.05)
+    monkeypatch.setattr(server, "llm_pool", pool)
+    items = [{"user_id": "u1", "text": f"Update {n} from the field team"} for n in range(server.EMOTION_BATCH_SIZE * 10)]
+
+    response = await client.post("/api/emotion/analyze/batch", json={"items": items})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["errors"] == []
+    assert len(body["results"]) == len(items)
+    assert pool.stats()["rejected"] == 0
@@ -0,0 +1,46 @@
+import pytest
+
+server = pytest.importorskip("server")
+
+def expert(expert_id: str, tags, expertise: float = 80.0, rating: float = 4.0) -> dict:
+    return server.Expert(id=expert_id, name=expert_id, title="Advisor", specialization=list(tags),
+                         expertise_level=expertise, rating=rating, bio="").model_dump()
+
+@pytest.fixture
+def index():
+    index = server.ExpertIndex()
+    index.rebuild([
+        expert("growth", ["Marketing", "Growth"], expertise=90, rating=4.5),
+        expert("content", ["Marketing Automation"], expertise=70, rating=4.8),
+        expert("finance", ["Finance", "Fundraising"], expertise=95, rating=4.9),
+        expert("ops", ["Operations"], expertise=60, rating=3.0)
+    ])
+    return index
+
+def ids(results) -> list:
+    return [result["id"] for result in results]
+
+def test_exact_tag_wins_over_prefix_matches(index):
+    assert ids(index.search("marketing", 10)) == ["growth"]
+
+def test_prefix_matches_every_tag_starting_with_the_topic(index):
+    assert ids(index.search("fun", 10)) == ["finance"]
+    assert set(ids(index.search("market", 10))) == {"growth", "content"}
+
+def test_fuzzy_match_catches_typos(index):
+    assert ids(index.search("operatons", 10)) == ["ops"]
+    assert index.search("astrophysics", 10) == []
+
+def test_results_rank_by_expertise_and_rating(index):
+    # 0.6 * expertise / 100 + 0.4 * rating / 5
+    assert ids(index.search("market", 10)) == ["growth", "content"]
+    assert ids(index.search(None, 10)) == ["finance", "growth", "content", "ops"]
+    assert ids(index.search(None, 2)) == ["finance", "growth"]
+
+def test_upsert_and_remove_keep_tags_consistent(index):
+    index.upsert(expert("ops", ["Supply Chain"], expertise=60, rating=3.0))
+
+    assert index.search("operations", 10) == []
+    assert ids(index.search("supply", 10)) == ["ops"]
+    index.remove("ops")
+    assert "supply chain" not in index.tags and "supply chain" not in index.sorted_tags
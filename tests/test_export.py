@@ -0,0 +1,18 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+async def test_export_only_streams_the_current_users_records(db, user, client):
+    await db.personas.insert_many([
+        {"id": "mine", "user_id": "u1", "created_at": datetime.now(timezone.utc)},
+        {"id": "theirs", "user_id": "u2", "created_at": datetime.now(timezone.utc)}
+    ])
+
+    response = await client.get("/api/export/personas", params={"user_id": "u2"})
+
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["mine"]
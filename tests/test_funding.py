@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+server = pytest.importorskip("server")
+
+def opportunity(name: str, **criteria) -> dict:
+    return {
+        "id": name, "name": name, "type": "grant", "amount_min": 10000, "amount_max": 50000, "provider": "Agency",
+        "eligibility": [], "requirements": [], "application_url": "https://example.com", "criteria": criteria
+    }
+
+def search(matcher, employee_count: int = 20, needs=(), **fields) -> dict:
+    request = server.FundingSearchRequest(**{"industry": "fintech", "stage": "seed", "location": "US", "revenue": "$1M",
+                                             "employee_count": employee_count, "needs": list(needs), **fields})
+    return {result.id: result.match_score for result in matcher.search(request, 20)}
+
+def matcher_for(*opportunities) -> "server.FundingMatcher":
+    matcher = server.FundingMatcher()
+    for doc in opportunities:
+        matcher.add(doc)
+    return matcher
+
+def test_empty_criteria_match_any_value_but_score_below_listed_ones():
+    matcher = matcher_for(opportunity("open"), opportunity("fintech", industries=["Fintech"]), opportunity("health", industries=["healthcare"]))
+
+    scores = search(matcher)
+
+    assert set(scores) == {"open", "fintech"}
+    assert scores["fintech"] - scores["open"] == server.FundingMatcher.WEIGHTS["industries"]
+
+def test_location_parts_match_individually():
+    matcher = matcher_for(opportunity("eu", locations=["germany"]), opportunity("us", locations=["us"]))
+
+    assert set(search(matcher, location="Berlin, Germany")) == {"eu"}
+
+@pytest.mark.parametrize("employee_count, eligible", [(9, False), (10, True), (49, True), (50, False)])
+def test_employee_range_edges_are_inclusive(employee_count, eligible):
+    matcher = matcher_for(opportunity("small", min_employees=10, max_employees=49))
+
+    assert ("small" in search(matcher, employee_count)) is eligible
+
+def test_open_ended_employee_range_covers_the_top_band():
+    matcher = matcher_for(opportunity("scaleup", min_employees=250))
+
+    assert set(search(matcher, 5000)) == {"scaleup"}
+    assert search(matcher, 249) == {}
+
+def test_needs_score_the_share_of_requested_needs_covered():
+    matcher = matcher_for(opportunity("hiring", needs=["Hiring", "R&D"]), opportunity("none"))
+
+    scores = search(matcher, needs=["hiring", "marketing"])
+
+    assert scores["hiring"] - scores["none"] == server.FundingMatcher.WEIGHTS["needs"] / 2
+    assert list(scores) == ["hiring", "none"]
+
+@pytest.mark.anyio
+async def test_catalogue_writes_from_other_processes_are_picked_up(db, monkeypatch):
+    monkeypatch.setattr(server, "FUNDING_POLL_INTERVAL", 0.01)
+    matcher = server.FundingMatcher()
+    await matcher.start()
+    try:
+        serving_defaults = matcher.serving_defaults
+        await db.funding_opportunities.insert_one(opportunity("stored"))
+        await asyncio.sleep(0.1)
+        added = set(search(matcher))
+        await db.funding_opportunities.delete_one({"id": "stored"})
+        await asyncio.sleep(0.1)
+    finally:
+        await matcher.stop()
+
+    assert serving_defaults
+    assert added == {"stored"}
+    assert matcher.serving_defaults
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+async def test_kb_index_picks_up_writes_from_other_processes(db, monkeypatch):
+    monkeypatch.setattr(server, "KB_POLL_INTERVAL", 0.01)
+    kb_index = server.KnowledgeSearchIndex()
+    article = server.KnowledgeArticle(title="Churn playbook", content="Reduce churn with onboarding", category="growth",
+                                      tags=["retention"], author="Ops", read_time=4)
+    await kb_index.start()
+    try:
+        # Written by another worker process, so only the watcher can notice
+        await db.knowledge_articles.insert_one(article.model_dump())
+        await asyncio.sleep(0.1)
+        added = [doc["id"] for doc in kb_index.search("churn", 5)]
+        await db.knowledge_articles.delete_one({"id": article.id})
+        await asyncio.sleep(0.1)
+        removed = kb_index.search("churn", 5)
+    finally:
+        await kb_index.stop()
+
+    assert (added, removed) == ([article.id], [])
+
+async def test_dna_index_picks_up_writes_from_other_processes(db, monkeypatch):
+    monkeypatch.setattr(server, "DNA_POLL_INTERVAL", 0.01)
+    dna_index = server.DnaSimilarityIndex(server.DNA_ANN_THRESHOLD, server.DNA_LSH_TABLES, server.DNA_LSH_BITS)
+    traits = {trait: 50.0 for trait in server.PERSONALITY_TRAITS}
+
+    def dna(user_id: str):
+        return server.BusinessDNA(company_id=user_id, company_name=user_id, industry="SaaS", stage="seed",
+                                  personality=server.PersonalityMetrics(**traits), swot=server.SWOTAnalysis(
+                                      strengths=[], weaknesses=[], opportunities=[], threats=[]),
+                                  preferences={}, user_id=user_id).model_dump()
+
+    await dna_index.start()
+    try:
+        await db.business_dna.insert_many([dna("a"), dna("b")])
+        await asyncio.sleep(0.1)
+        added = sorted(dna_index.positions)
+        await db.business_dna.delete_many({"user_id": "b"})
+        await asyncio.sleep(0.1)
+        removed = sorted(dna_index.positions)
+    finally:
+        await dna_index.stop()
+
+    assert (added, removed) == (["a", "b"], ["a"])
+    assert dna_index.nearest("a", 5) == []
+
+def article(title: str, content: str) -> "server.KnowledgeArticle":
+    return server.KnowledgeArticle(title=title, content=content, category="growth", tags=["retention"], author="Ops", read_time=4)
+
+async def test_api_added_article_survives_a_poll(db, user, client, monkeypatch):
+    kb_index = server.KnowledgeSearchIndex()
+    monkeypatch.setattr(server, "kb_index", kb_index)
+    added = await client.post("/api/community/kb/articles", json={
+        "title": "Churn playbook", "content": "Reduce churn with onboarding", "category": "growth",
+        "tags": ["retention"], "author": "Ops", "read_time": 4
+    })
+
+    # Mongo hands the article back with a naive, millisecond created_at
+    await kb_index.refresh()
+
+    assert [doc["id"] for doc in kb_index.search("churn", 5)] == [added.json()["id"]]
+    assert len(kb_index.articles) == 1
+
+async def test_edited_articles_stay_searchable(db):
+    kb_index = server.KnowledgeSearchIndex()
+    articles = [article(f"Churn note {n}", f"Onboarding draft {n}") for n in range(4)]
+    await db.knowledge_articles.insert_many([doc.model_dump() for doc in articles])
+    await kb_index.refresh()
+    for doc in articles:
+        await db.knowledge_articles.update_one({"id": doc.id}, {"$set": {"content": f"Onboarding final {doc.id}"}})
+    await kb_index.refresh()
+    await kb_index.refresh()
+
+    assert {doc["id"] for doc in kb_index.search("churn", 10)} == {doc.id for doc in articles}
+    assert all(doc["content"].startswith("Onboarding final") for doc in kb_index.search("churn", 10))
+
+def test_repeated_edits_compact_the_postings():
+    kb_index = server.KnowledgeSearchIndex()
+    kept, edited = article("Pricing guide", "Annual plans"), article("Churn note", "Draft")
+    kb_index.add(kept.model_dump())
+    for n in range(200):
+        kb_index.add({**edited.model_dump(), "content": f"Revision {n}"})
+        kb_index.compact()
+
+    assert len(kb_index.articles) <= 66
+    assert [doc["content"] for doc in kb_index.search("churn", 5)] == ["Revision 199"]
+    assert [doc["id"] for doc in kb_index.search("pricing", 5)] == [kept.id]
+    assert kb_index.doc_freq["revision"] == 1
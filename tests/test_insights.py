@@ -0,0 +1,44 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+server = pytest.importorskip("server")
+
+@pytest.fixture
+def insights(db, fake_llm):
+    return server.InsightsService()
+
+def request(topic: str) -> "server.GenerateInsightsRequest":
+    return server.GenerateInsightsRequest(industry="retail", topic=topic, timeframe="month")
+
+@pytest.mark.anyio
+async def test_fallback_insights_get_a_short_ttl(insights, db):
+    await insights.get(request("pricing"))
+    doc = await db.community_insights.find_one({"_id": insights.key(request("pricing"))})
+
+    expires_at = doc["expires_at"].replace(tzinfo=timezone.utc)
+    assert expires_at < datetime.now(timezone.utc) + timedelta(seconds=server.INSIGHTS_FALLBACK_TTL + 5)
+    assert insights.stats()["fallbacks"] == 1
+
+def test_tracked_keys_are_bounded(insights, monkeypatch):
+    monkeypatch.setattr(server, "INSIGHTS_TRACKED_KEYS", 3)
+    for n in range(10):
+        insights.track(f"key-{n}", request(f"topic-{n}"))
+    assert list(insights.requests) == ["key-7", "key-8", "key-9"]
+    assert set(insights.popularity) == {"key-7", "key-8", "key-9"}
+
+@pytest.mark.anyio
+async def test_failed_view_flush_keeps_counts(insights, monkeypatch):
+    class FailingCollection:
+        async def bulk_write(self, *args, **kwargs):
+            raise RuntimeError("primary stepped down")
+
+    class FailingDatabase:
+        community_insights = FailingCollection()
+
+    monkeypatch.setattr(server, "db", FailingDatabase())
+    insights.pending_views[("key", "insight")] = 3
+    with pytest.raises(RuntimeError):
+        await insights.flush_views()
+    assert insights.pending_views[("key", "insight")] == 3
+    assert insights.stats()["flush_errors"] == 1
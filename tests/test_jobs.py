@@ -0,0 +1,52 @@
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+def make_queue(runs: Counter) -> "server.JobQueue":
+    async def handler(request):
+        runs[request.text] += 1
+        await asyncio.sleep(0.01)
+        return request
+
+    queue = server.JobQueue(server.MongoJobStore(), workers=3, max_retries=0, retry_delay=0, lease=30, poll_interval=0.02)
+    queue.register("echo", server.EmotionAnalyzeRequest, handler)
+    return queue
+
+async def test_two_processes_run_each_job_once(db):
+    runs = Counter()
+    first, second = make_queue(runs), make_queue(runs)
+    await first.start()
+    await second.start()
+    jobs = [await first.submit("echo", {"user_id": "u1", "text": f"job-{n}"}, "u1") for n in range(20)]
+    for _ in range(200):
+        if await db.jobs.count_documents({"status": "succeeded"}) == len(jobs):
+            break
+        await asyncio.sleep(0.02)
+    await first.stop()
+    await second.stop()
+
+    assert first.succeeded + second.succeeded == 20
+    assert runs == Counter({f"job-{n}": 1 for n in range(20)})
+
+async def test_only_lease_expired_running_jobs_are_recovered(db):
+    runs = Counter()
+    now = datetime.now(timezone.utc)
+    base = {"kind": "echo", "status": "running", "attempts": 1, "user_id": "u1", "created_at": now}
+    await db.jobs.insert_many([
+        {**base, "id": "live", "payload": {"user_id": "u1", "text": "live"}, "owner": "other", "lease_until": now + timedelta(minutes=5)},
+        {**base, "id": "expired", "payload": {"user_id": "u1", "text": "expired"}, "owner": "crashed", "lease_until": now - timedelta(minutes=5)}
+    ])
+    queue = make_queue(runs)
+    await queue.start()
+    await asyncio.sleep(0.2)
+    await queue.stop()
+
+    statuses = {job["id"]: job["status"] for job in await db.jobs.find({}, {"_id": 0}).to_list(None)}
+    assert statuses == {"live": "running", "expired": "succeeded"}
+    assert runs == Counter({"expired": 1})
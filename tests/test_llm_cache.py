@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+async def test_cancelled_leader_does_not_fail_coalesced_followers():
+    cache = server.LlmResponseCache(max_size=10, ttl=60, persist=False)
+    calls = 0
+
+    async def slow_call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "shared answer"
+
+    leader = asyncio.create_task(cache.get_or_call("system", "prompt", slow_call))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_call("system", "prompt", slow_call))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await follower == "shared answer"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    # The finished call still populated the cache
+    assert await cache.get_or_call("system", "prompt", slow_call) == "shared answer"
+    assert calls == 1
+    assert cache.stats()["coalesced"] == 1 and cache.stats()["memory_hits"] == 1
+
+async def test_single_flight_propagates_errors_to_every_caller():
+    flight = server.SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(flight.run("k", failing), flight.run("k", failing), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+
+class ScriptedLlm:
+    """Replies from a fixed script, one entry per call"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def __call__(self, system_message: str) -> "ScriptedLlm":
+        return self
+
+    async def send_message(self, message) -> str:
+        self.calls += 1
+        return self.replies.pop(0)
+
+async def test_unparseable_replies_are_not_cached(db, monkeypatch):
+    llm = ScriptedLlm(["Sorry, I can't help with that.", '{"emotions": {"joy": 0.9}, "dominant_emotion": "joy", "confidence": 0.8}'])
+    cache = server.LlmResponseCache(max_size=10, ttl=60, persist=True)
+    monkeypatch.setattr(server, "llm_cache", cache)
+    monkeypatch.setattr(server.llm_pool, "factory", llm)
+
+    async def analyze():
+        return await server.call_ai_structured("How does this read?", "system", server.EMOTION_DRAFT_ADAPTER, "emotion")
+
+    first, second, third = await analyze(), await analyze(), await analyze()
+
+    assert first is None
+    assert second.dominant_emotion == third.dominant_emotion == "joy"
+    assert llm.calls == 2
+    assert cache.stats()["rejected"] == 1 and cache.stats()["memory_hits"] == 1
+    assert await db.llm_cache.count_documents({}) == 1
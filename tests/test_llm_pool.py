@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+class SlowLlm:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def __call__(self, system_message: str) -> "SlowLlm":
+        return self
+
+    async def send_message(self, message) -> str:
+        await asyncio.sleep(self.latency)
+        return "ok"
+
+def make_pool(max_queue: int, queue_timeout: float) -> "server.LlmPool":
+    pool = server.LlmPool(max_concurrency=1, max_queue=max_queue, queue_timeout=queue_timeout, call_timeout=5)
+    pool.factory = SlowLlm(0.05)
+    return pool
+
+async def test_full_queue_rejects_with_retry_after():
+    pool = make_pool(max_queue=1, queue_timeout=5)
+
+    results = await asyncio.gather(*[pool.send(f"prompt {n}", "system") for n in range(3)], return_exceptions=True)
+
+    assert results[:2] == ["ok", "ok"]
+    assert isinstance(results[2], server.HTTPException)
+    assert results[2].status_code == 429 and results[2].headers == {"Retry-After": "1"}
+    assert pool.stats()["rejected"] == 1
+
+async def test_queue_timeout_rejects_without_leaking_the_slot():
+    pool = make_pool(max_queue=5, queue_timeout=0.01)
+
+    results = await asyncio.gather(pool.send("first", "system"), pool.send("second", "system"), return_exceptions=True)
+
+    assert results[0] == "ok"
+    assert isinstance(results[1], server.HTTPException) and results[1].status_code == 429
+    assert await pool.send("third", "system") == "ok"
+    assert pool.stats()["in_flight"] == 0 and pool.stats()["queue_depth"] == 0
+
+async def test_batch_work_waits_for_a_slot_instead():
+    pool = make_pool(max_queue=0, queue_timeout=0.01)
+
+    results = await asyncio.gather(*[pool.send(f"prompt {n}", "system", wait_for_slot=True) for n in range(3)])
+
+    assert results == ["ok"] * 3
+    assert pool.stats()["rejected"] == 0
+
+async def test_call_ai_surfaces_the_rejection(monkeypatch):
+    pool = make_pool(max_queue=0, queue_timeout=5)
+    monkeypatch.setattr(server, "llm_pool", pool)
+    monkeypatch.setattr(server, "llm_cache", server.LlmResponseCache(max_size=0, ttl=60, persist=False))
+
+    results = await asyncio.gather(server.call_ai("first"), server.call_ai("second"), return_exceptions=True)
+
+    assert results[0] == "ok"
+    assert isinstance(results[1], server.HTTPException) and results[1].status_code == 429
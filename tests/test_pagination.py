@@ -0,0 +1,54 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def analysis(n: int, minutes: int) -> dict:
+    return server.EmotionAnalysis(id=f"a{n:02d}", user_id="u1", text=f"note {n}", emotions={"joy": 1.0}, dominant_emotion="joy",
+                                  confidence=0.9, timestamp=NOW - timedelta(minutes=minutes)).model_dump()
+
+async def walk(client, path: str, **params) -> list:
+    pages, cursor = [], None
+    while True:
+        body = (await client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})).json()
+        pages.append([item["id"] for item in body["items"]])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return pages
+
+@pytest.mark.parametrize("fast", [False, True])
+async def test_cursor_walks_every_document_once_with_timestamp_ties(db, user, client, monkeypatch, fast):
+    monkeypatch.setattr(server, "FAST_SERIALIZATION", fast)
+    # Pairs share a timestamp, so pages must break ties on id
+    await db.emotion_analysis.insert_many([analysis(n, n // 2) for n in range(9)])
+
+    pages = await walk(client, "/api/emotion/history/u1/page", limit=2)
+
+    assert pages == [["a01", "a00"], ["a03", "a02"], ["a05", "a04"], ["a07", "a06"], ["a08"]]
+
+async def test_unsorted_collections_page_by_id(db, user, client):
+    await db.team_members.insert_many([
+        server.TeamMember(id=f"m{n}", name=f"Member {n}", role="Engineer", user_id="u1").model_dump() for n in (3, 1, 2)
+    ])
+
+    assert await walk(client, "/api/team/members/u1/page", limit=2) == [["m1", "m2"], ["m3"]]
+
+@pytest.mark.parametrize("fast", [False, True])
+async def test_fields_project_the_requested_keys_plus_cursor_keys(db, user, client, monkeypatch, fast):
+    monkeypatch.setattr(server, "FAST_SERIALIZATION", fast)
+    await db.emotion_analysis.insert_one(analysis(0, 0))
+
+    body = (await client.get("/api/emotion/history/u1/page", params={"fields": "dominant_emotion"})).json()
+
+    assert set(body["items"][0]) == {"id", "timestamp", "dominant_emotion"}
+
+async def test_unknown_fields_and_bad_cursors_are_rejected(db, user, client):
+    unknown = await client.get("/api/emotion/history/u1/page", params={"fields": "secret"})
+    garbled = await client.get("/api/emotion/history/u1/page", params={"cursor": "not-a-cursor"})
+
+    assert (unknown.status_code, garbled.status_code) == (400, 400)
@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+server = pytest.importorskip("server")
+
+def member(n: int) -> "server.User":
+    return server.User(id=f"u{n}", email=f"u{n}@example.com", name=f"U{n}")
+
+IN_A_DAY = datetime.now(timezone.utc) + timedelta(days=1)
+
+def test_entries_expire_with_the_cache_ttl(monkeypatch):
+    cache = server.SessionCache(max_size=10, ttl=60)
+    clock = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: clock[0])
+    cache.put("t1", member(1), IN_A_DAY)
+
+    clock[0] += 59
+    assert cache.get("t1").id == "u1"
+    clock[0] += 2
+    assert cache.get("t1") is None
+
+def test_entries_expire_with_the_session():
+    cache = server.SessionCache(max_size=10, ttl=60)
+    # Mongo hands back naive datetimes
+    cache.put("t1", member(1), (datetime.now(timezone.utc) - timedelta(seconds=1)).replace(tzinfo=None))
+
+    assert cache.get("t1") is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = server.SessionCache(max_size=2, ttl=60)
+    cache.put("t1", member(1), IN_A_DAY)
+    cache.put("t2", member(2), IN_A_DAY)
+    cache.get("t1")
+    cache.put("t3", member(3), IN_A_DAY)
+
+    assert cache.get("t2") is None
+    assert cache.get("t1").id == "u1" and cache.get("t3").id == "u3"
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.anyio
+async def test_logout_is_seen_by_other_workers(db, monkeypatch):
+    monkeypatch.setattr(server, "SESSION_REVOCATION_POLL_INTERVAL", 0.01)
+    # Two workers, each with its own cache, sharing one database
+    workers = [server.SessionRevocations(server.SessionCache(max_size=10, ttl=60)) for _ in range(2)]
+    for worker in workers:
+        worker.cache.put("t1", member(1), IN_A_DAY)
+        await worker.start()
+    try:
+        await workers[0].revoke("t1")
+        local = workers[0].cache.get("t1")
+        await asyncio.sleep(0.1)
+        remote = workers[1].cache.get("t1")
+    finally:
+        for worker in workers:
+            await worker.stop()
+
+    assert local is None and remote is None
@@ -0,0 +1,23 @@
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+async def test_team_metrics_backfill_rollups_from_existing_analyses(db):
+    joyful = {"emotions": {"joy": 1.0}, "dominant_emotion": "joy", "confidence": 0.9}
+    # History recorded before rollups existed, then one analysis whose rollup upsert lands first
+    await db.emotion_analysis.insert_many([
+        server.EmotionAnalysis(user_id="owner", text=f"note {n}", **joyful).model_dump() for n in range(4)
+    ])
+    latest = server.EmotionAnalysis(user_id="owner", text="note 4", **joyful)
+    await db.emotion_analysis.insert_one(latest.model_dump())
+    await server.record_emotion_rollups([latest])
+    await db.team_members.insert_one(server.TeamMember(name="Ana", role="Engineer", performance_score=80.0, user_id="owner").model_dump())
+
+    performance = await server.compute_team_metrics("owner")
+    rollup = await db.emotion_rollups.find_one({"_id": "owner"})
+
+    assert rollup["count"] == 5 and rollup["initialized"]
+    assert performance.morale == 100.0
+    assert performance.team_size == 1 and performance.productivity_score == 80.0
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+server = pytest.importorskip("server")
+
+pytestmark = pytest.mark.anyio
+
+async def test_ack_callers_share_one_batch_and_wait_for_the_write(db):
+    buffer = server.WriteBuffer(max_batch=100, flush_interval=0.01, durability="ack")
+
+    await asyncio.gather(*[buffer.insert("notes", {"id": f"n{n}"}) for n in range(5)])
+
+    assert await db.notes.count_documents({}) == 5
+    assert buffer.stats()["flushes"] == 1
+
+async def test_fire_and_forget_returns_before_the_write(db):
+    buffer = server.WriteBuffer(max_batch=100, flush_interval=0.01, durability="fire_and_forget")
+
+    await buffer.insert("notes", {"id": "n1"})
+    before = await db.notes.count_documents({})
+    await buffer.flush_all()
+
+    assert (before, await db.notes.count_documents({})) == (0, 1)
+
+async def test_full_batch_flushes_without_waiting_for_the_timer(db):
+    buffer = server.WriteBuffer(max_batch=3, flush_interval=60, durability="ack")
+
+    await asyncio.wait_for(asyncio.gather(*[buffer.insert("notes", {"id": f"n{n}"}) for n in range(3)]), 1)
+
+    assert await db.notes.count_documents({}) == 3
+
+async def test_bulk_write_errors_fail_only_the_offending_document(db):
+    await db.notes.create_index("id", unique=True)
+    await db.notes.insert_one({"id": "taken"})
+    buffer = server.WriteBuffer(max_batch=100, flush_interval=0.01, durability="ack")
+
+    results = await asyncio.gather(*[buffer.insert("notes", {"id": note_id}) for note_id in ("a", "taken", "b")], return_exceptions=True)
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], Exception)
+    assert await db.notes.count_documents({}) == 3
+    assert buffer.stats()["errors"] == 1
+
+async def test_fire_and_forget_failures_are_counted_not_raised(db):
+    await db.notes.create_index("id", unique=True)
+    await db.notes.insert_one({"id": "taken"})
+    buffer = server.WriteBuffer(max_batch=100, flush_interval=0.01, durability="fire_and_forget")
+
+    await buffer.insert("notes", {"id": "taken"})
+    await buffer.flush_all()
+
+    assert buffer.stats()["errors"] == 1